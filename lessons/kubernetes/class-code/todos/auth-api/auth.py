@@ -1,36 +1,130 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import requests
 import os
+import secrets
+import sys
+from urllib.parse import quote
 from flask_cors import CORS
+from credentials import CredentialCache
+
+# http_client.py sits next to this file in the image, and in ../shared in a
+# checkout
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from http_client import ServiceClient, render_metrics
+from tokens import InvalidToken, RevocationList, TokenSigner, bearer_token
 
 app = Flask(__name__)
 CORS(app)
 
 users_url = os.environ.get('USERS_API_URL','http://localhost:5001')
 
+# Pooled keep-alive connections to users-api, with retries and a breaker
+users_api = ServiceClient(
+    'users-api',
+    users_url,
+    timeout=float(os.environ.get('USERS_API_TIMEOUT', '2')),
+    deadline=float(os.environ.get('USERS_API_DEADLINE', '5')),
+    retries=int(os.environ.get('USERS_API_RETRIES', '2')),
+    pool_size=int(os.environ.get('USERS_API_POOL_SIZE', '10')),
+)
+
+# Every service that verifies tokens needs the same TOKEN_SECRET
+token_secret = os.environ.get('TOKEN_SECRET')
+if not token_secret:
+    token_secret = secrets.token_hex(32)
+    print('TOKEN_SECRET is not set; tokens from this process only verify here')
+signer = TokenSigner(token_secret, ttl=int(os.environ.get('TOKEN_TTL', '3600')))
+# Logged-out tokens, until they would have expired
+revoked = RevocationList(int(os.environ.get('REVOKED_TOKENS_MAX', '100000')))
+
+# Users looked up by name, so most logins need no call to users-api
+credentials = CredentialCache(
+    max_entries=int(os.environ.get('CREDENTIAL_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('CREDENTIAL_CACHE_TTL', '300')),
+)
+
+def fetch_users_by_name(name):
+    response = users_api.get(f"/users/by-name/{quote(name, safe='')}")
+    if response.status_code == 404:
+        found = []
+    else:
+        response.raise_for_status()
+        found = response.json()['users']
+    credentials.put(name, found)
+    return found
+
+def find_user(name, password):
+    found = credentials.get(name)
+    cached = found is not None
+    if not cached:
+        found = fetch_users_by_name(name)
+    user = next((user for user in found if user['email'] == password), None)
+    if user is None and cached:
+        # The cached copy may predate a new user or a changed email; check
+        # users-api once before refusing
+        user = next((user for user in fetch_users_by_name(name) if user['email'] == password), None)
+    return user
+
 @app.get('/healthz')
 def heath_check():
     return jsonify ({"status":"UP"})
 
+@app.get('/metrics')
+def metrics():
+    return Response(render_metrics([users_api]), content_type='text/plain; version=0.0.4')
+
 @app.post('/auth/login')
 def login():
     data = request.json
     print(data)
     if not data or 'username' not in data.keys():
         return 404
-    response = requests.get(f'{users_url}/users')
-    # print(response.json()['users'])
-    for user in response.json()['users']:
-        if user['name'] == data['username'] and user['email'] == data['password']:
-            return 'status yeah',200
+    # Names go into a URL and a cache key; anything but text cannot match
+    if not isinstance(data['username'], str) or not isinstance(data.get('password'), str):
+        return 'not yeah',403
+    try:
+        user = find_user(data['username'], data['password'])
+    except requests.RequestException:
+        return jsonify({"error": "Could not reach users-api"}), 503
+    if user:
+        token, claims = signer.issue(user['id'])
+        return jsonify({"token": token, "user_id": user['id'], "expires_at": claims['exp']}), 200
     return 'not yeah',403
 
+@app.get('/auth/verify')
+def verify():
+    # For callers that cannot check tokens themselves; todos-api does it locally
+    try:
+        claims = signer.verify(bearer_token(request.headers.get('Authorization')), revoked)
+    except InvalidToken as exc:
+        return jsonify({"error": str(exc)}), 401
+    return jsonify({"user_id": claims['sub'], "expires_at": claims['exp']})
+
+@app.get('/auth/revoked')
+def revoked_tokens():
+    # Token ids logged out before expiry; verifiers poll this in the background
+    return jsonify({"revoked": revoked.snapshot()})
+
+@app.post('/auth/cache/invalidate')
+def invalidate_credentials():
+    # {"username": "chen"} forgets one user; an empty body forgets everyone
+    data = request.get_json(silent=True) or {}
+    credentials.invalidate(data.get('username'))
+    return jsonify({"success": True, "cached": len(credentials)})
+
 
 
 @app.route('/auth/logout', methods=['POST'])
 def logout():
-    data = request.get_json()
-    return jsonify({"success": True})
+    data = request.get_json(silent=True) or {}
+    token = bearer_token(request.headers.get('Authorization')) or data.get('token')
+    try:
+        claims = signer.verify(token)
+    except InvalidToken:
+        # Nothing to revoke; logging out twice is not an error
+        return jsonify({"success": True, "revoked": False})
+    revoked.add(claims['jti'], claims['exp'])
+    return jsonify({"success": True, "revoked": True})
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5002))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CredentialCache:
+    """Users fetched from users-api by name, kept for ``ttl`` seconds.
+
+    At most ``max_entries`` names are kept; the least recently used go first.
+    A name that users-api does not know is cached as an empty list.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # name -> (users, expires at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            found, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return found
+
+    def put(self, name, found):
+        with self._lock:
+            self._entries[name] = (found, self._clock() + self.ttl)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, name=None):
+        """Forget one name, or every name when ``name`` is None."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
@@ -0,0 +1,211 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Answers worth another attempt: the service is restarting or overloaded.
+RETRY_STATUSES = {502, 503, 504}
+
+# (name, type, help) of every metric family a client exports.
+METRICS = (
+    ("http_client_requests_total", "counter",
+     "Requests sent, each retry counted."),
+    ("http_client_retries_total", "counter", "Requests sent again."),
+    ("http_client_failures_total", "counter",
+     "Requests that raised or got a 5xx answer."),
+    ("http_client_circuit_rejections_total", "counter",
+     "Calls refused because the circuit was open."),
+    ("http_client_pool_connections_total", "counter",
+     "Connections opened."),
+    ("http_client_pool_reuses_total", "counter",
+     "Requests sent over an already open connection."),
+    ("http_client_circuit_state", "gauge",
+     "Circuit breaker state: 0 closed, 1 half-open, 2 open."),
+    ("http_client_circuit_opened_total", "counter",
+     "Times the circuit breaker opened."),
+)
+
+
+class CircuitOpen(requests.RequestException):
+    """Raised instead of calling a service the breaker considers down."""
+
+
+class CircuitBreaker:
+    """Stops calling a failing service and lets one trial call through later.
+
+    After ``failure_threshold`` failed calls in a row the breaker opens and
+    every call fails fast for ``reset_timeout`` seconds. Then it is
+    half-open: one call goes through, and its outcome closes the breaker or
+    opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0  # how many times it has opened
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if (self.state == self.HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class ServiceClient:
+    """Keep-alive HTTP client for one downstream service.
+
+    One requests.Session with a sized connection pool is shared by every
+    request thread, so calls reuse open connections instead of connecting
+    each time. Each call has an overall ``deadline``; each attempt within it
+    has ``timeout``. Connection errors and 502/503/504 are retried up to
+    ``retries`` times after a random (full jitter) backoff, so callers that
+    failed together do not all come back at once. A circuit breaker fails
+    calls immediately while the service keeps failing.
+    """
+
+    def __init__(self, name, base_url, timeout=2.0, deadline=5.0, retries=2,
+                 backoff=0.1, pool_size=10, failure_threshold=5,
+                 reset_timeout=10.0):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=0
+        )
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self.counts = {"requests": 0, "retries": 0, "failures": 0,
+                       "rejected": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def get(self, path, deadline=None, **kwargs):
+        """GET ``path``; returns the response or raises RequestException.
+
+        A response with any status is returned once an attempt gets one that
+        is not retried. Raises CircuitOpen without calling the service while
+        the breaker is open.
+        """
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise CircuitOpen(f"{self.name} circuit is open")
+            remaining = deadline_at - time.monotonic()
+            self._count("requests")
+            try:
+                response = self.session.get(
+                    self.base_url + path,
+                    timeout=min(self.timeout, max(remaining, 0.001)),
+                    **kwargs,
+                )
+            except requests.RequestException as exc:
+                response, error = None, exc
+            else:
+                error = None
+
+            failed = response is None or response.status_code >= 500
+            if failed:
+                self.breaker.record_failure()
+                self._count("failures")
+            else:
+                self.breaker.record_success()
+            retry = response is None or response.status_code in RETRY_STATUSES
+            if not retry:
+                return response
+
+            pause = random.uniform(0, self.backoff * 2 ** attempt)
+            if (attempt >= self.retries
+                    or time.monotonic() + pause >= deadline_at):
+                if response is not None:
+                    return response
+                raise error
+            attempt += 1
+            self._count("retries")
+            time.sleep(pause)
+
+    def pool_stats(self):
+        """Connections opened and requests sent over the pooled connections."""
+        opened = sent = 0
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+        return {"connections": opened, "reused": max(sent - opened, 0)}
+
+    def samples(self):
+        """Current value of each metric in METRICS, by name."""
+        states = (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN,
+                  CircuitBreaker.OPEN)
+        pool = self.pool_stats()
+        return {
+            "http_client_requests_total": self.counts["requests"],
+            "http_client_retries_total": self.counts["retries"],
+            "http_client_failures_total": self.counts["failures"],
+            "http_client_circuit_rejections_total": self.counts["rejected"],
+            "http_client_pool_connections_total": pool["connections"],
+            "http_client_pool_reuses_total": pool["reused"],
+            "http_client_circuit_state": states.index(self.breaker.state),
+            "http_client_circuit_opened_total": self.breaker.opened,
+        }
+
+
+def render_metrics(clients):
+    """Prometheus text exposition of several clients' metrics.
+
+    Samples are grouped by family, one service label per client, so each
+    family appears once with its HELP and TYPE lines.
+    """
+    samples = [(client.name, client.samples()) for client in clients]
+    lines = []
+    for name, kind, help_text in METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for service, values in samples:
+            lines.append(f'{name}{{service="{service}"}} {values[name]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,42 @@
+import pytest
+
+from tokens import InvalidToken, RevocationList, TokenSigner, bearer_token
+
+
+def test_issued_token_verifies():
+    signer = TokenSigner("secret")
+    token, claims = signer.issue(7)
+    assert signer.verify(token) == claims
+    assert claims["sub"] == 7
+
+
+@pytest.mark.parametrize("token", [None, "", "abc", "a.b.c", "a.é", "é.é", "a.b"])
+def test_malformed_token_is_invalid(token):
+    with pytest.raises(InvalidToken):
+        TokenSigner("secret").verify(token)
+
+
+def test_other_secret_is_rejected():
+    token, _ = TokenSigner("secret").issue(1)
+    with pytest.raises(InvalidToken):
+        TokenSigner("other").verify(token)
+
+
+def test_expired_and_revoked_tokens_are_rejected():
+    signer = TokenSigner("secret", ttl=60)
+    token, claims = signer.issue(1, now=1000)
+    with pytest.raises(InvalidToken, match="expired"):
+        signer.verify(token, now=1060)
+
+    token, claims = signer.issue(1)
+    revoked = RevocationList()
+    revoked.add(claims["jti"], claims["exp"])
+    with pytest.raises(InvalidToken, match="revoked"):
+        signer.verify(token, revoked)
+
+
+def test_bearer_token():
+    assert bearer_token("Bearer abc") == "abc"
+    assert bearer_token("bearer abc") == "abc"
+    assert bearer_token("Basic abc") is None
+    assert bearer_token(None) is None
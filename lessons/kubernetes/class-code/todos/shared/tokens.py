@@ -0,0 +1,121 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class InvalidToken(Exception):
+    """Raised for a token that is malformed, forged, expired or revoked."""
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class RevocationList:
+    """Ids of logged-out tokens, kept until the tokens would expire anyway.
+
+    Holds at most ``max_entries`` ids; past that the oldest revocation is
+    dropped first, which only matters if that many logouts happen within one
+    token lifetime.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # token id -> expiry (unix seconds)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, token_id):
+        return token_id in self._entries
+
+    def add(self, token_id, expires_at):
+        with self._lock:
+            self._entries[token_id] = expires_at
+            self._entries.move_to_end(token_id)
+            self._prune()
+
+    def snapshot(self):
+        with self._lock:
+            self._prune()
+            return dict(self._entries)
+
+    def replace(self, entries):
+        """Swap in a full list fetched from the service that issues logouts."""
+        fresh = OrderedDict(sorted(entries.items(), key=lambda item: item[1]))
+        with self._lock:
+            self._entries = fresh
+            self._prune()
+
+    def _prune(self):
+        now = time.time()
+        while self._entries:
+            token_id, expires_at = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+
+class TokenSigner:
+    """Issues and checks compact HMAC-SHA256 signed session tokens.
+
+    A token is ``<payload>.<signature>``, both base64url. The payload is
+    {"sub": user id, "exp": expiry, "jti": token id}. Any service holding
+    the same ``secret`` can verify a token locally, with no call to auth-api.
+    """
+
+    def __init__(self, secret, ttl=3600):
+        self._key = secret.encode() if isinstance(secret, str) else secret
+        self.ttl = ttl
+
+    def _sign(self, payload):
+        digest = hmac.new(self._key, payload.encode(), hashlib.sha256)
+        return _encode(digest.digest())
+
+    def issue(self, user_id, now=None):
+        """Return (token, claims) for ``user_id``."""
+        claims = {
+            "sub": user_id,
+            "exp": int((now or time.time()) + self.ttl),
+            "jti": secrets.token_hex(8),
+        }
+        payload = _encode(json.dumps(claims, separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}", claims
+
+    def verify(self, token, revoked=None, now=None):
+        """Return the claims of a valid token or raise InvalidToken."""
+        try:
+            payload, signature = token.split(".")
+        except (AttributeError, ValueError):
+            raise InvalidToken("malformed token") from None
+        # compare_digest refuses str with non-ASCII characters; bytes always work
+        expected = self._sign(payload).encode()
+        if not hmac.compare_digest(signature.encode(), expected):
+            raise InvalidToken("bad signature")
+        try:
+            claims = json.loads(_decode(payload))
+        except ValueError:
+            raise InvalidToken("malformed token") from None
+        if claims["exp"] <= (now or time.time()):
+            raise InvalidToken("token expired")
+        if revoked is not None and claims["jti"] in revoked:
+            raise InvalidToken("token revoked")
+        return claims
+
+
+def bearer_token(header):
+    """The token from an ``Authorization: Bearer <token>`` header, or None."""
+    scheme, _, token = (header or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
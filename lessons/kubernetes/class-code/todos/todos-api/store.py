@@ -0,0 +1,67 @@
+import itertools
+import threading
+
+
+class TodoStore:
+    """In-memory todos indexed by id and by user.
+
+    Every lookup is a dict access, so it stays O(1) however many todos there
+    are. Ids come from a counter that never goes backwards, so an id freed by
+    a delete is never handed out again. Flask serves requests on several
+    threads, so every change happens under one lock.
+    """
+
+    def __init__(self, todos=()):
+        self._todos = {}    # id -> todo
+        self._by_user = {}  # user_id -> {id: todo}, in creation order
+        self._lock = threading.RLock()
+        for todo in todos:
+            self._add(dict(todo))
+        self._ids = itertools.count(max(self._todos, default=0) + 1)
+
+    def __len__(self):
+        return len(self._todos)
+
+    def _add(self, todo):
+        self._todos[todo["id"]] = todo
+        self._by_user.setdefault(todo["user_id"], {})[todo["id"]] = todo
+
+    def all(self):
+        with self._lock:
+            return list(self._todos.values())
+
+    def for_user(self, user_id):
+        with self._lock:
+            return list(self._by_user.get(user_id, {}).values())
+
+    def get(self, todo_id):
+        return self._todos.get(todo_id)
+
+    def create(self, user_id, title):
+        with self._lock:
+            todo = {
+                "id": next(self._ids),
+                "user_id": user_id,
+                "title": title,
+                "completed": False
+            }
+            self._add(todo)
+            return todo
+
+    def update(self, todo_id, **fields):
+        with self._lock:
+            todo = self._todos.get(todo_id)
+            if todo is not None:
+                todo.update(fields)
+            return todo
+
+    def delete(self, todo_id):
+        with self._lock:
+            todo = self._todos.pop(todo_id, None)
+            if todo is None:
+                return None
+            user_todos = self._by_user[todo["user_id"]]
+            del user_todos[todo_id]
+            if not user_todos:
+                del self._by_user[todo["user_id"]]
+            return todo
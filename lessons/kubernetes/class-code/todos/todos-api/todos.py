@@ -1,44 +1,156 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 import os
+import sys
+import threading
+import time
 import requests
 from flask_cors import CORS
+from store import TodoStore
+from user_cache import UserCache
+
+# http_client.py sits next to this file in the image, and in ../shared in a
+# checkout
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from http_client import ServiceClient, render_metrics
+from tokens import InvalidToken, RevocationList, TokenSigner, bearer_token
 
 app = Flask(__name__)
 CORS(app)
 
 # Sample todos database
-todos = [
+todos = TodoStore([
     {"id": 1, "user_id": 1, "title": "Learn Kubernetes", "completed": False},
     {"id": 2, "user_id": 1, "title": "Study pod networking", "completed": True},
     {"id": 3, "user_id": 2, "title": "Practice with services", "completed": False},
     {"id": 4, "user_id": 3, "title": "Deploy multi-container app", "completed": False}
-]
+])
 
 # Get the API URLs from environment variables
 auth_url = os.environ.get('AUTH_API_URL', 'http://localhost:5002')
 users_url = os.environ.get('USERS_API_URL', 'http://localhost:5001')
 
+# Pooled keep-alive connections to users-api, with retries and a breaker
+users_api = ServiceClient(
+    'users-api',
+    users_url,
+    timeout=float(os.environ.get('USERS_API_TIMEOUT', '2')),
+    deadline=float(os.environ.get('USERS_API_DEADLINE', '5')),
+    retries=int(os.environ.get('USERS_API_RETRIES', '2')),
+    pool_size=int(os.environ.get('USERS_API_POOL_SIZE', '10')),
+)
+
+# With REQUIRE_TOKEN=true every todos call needs a token issued by auth-api.
+# Tokens are checked here with the shared TOKEN_SECRET, so no request goes to
+# auth-api; logouts arrive through a background poll of its revocation list.
+require_token = os.environ.get('REQUIRE_TOKEN', 'false').lower() == 'true'
+token_secret = os.environ.get('TOKEN_SECRET', '')
+if require_token and not token_secret:
+    raise RuntimeError('REQUIRE_TOKEN needs TOKEN_SECRET, the same one auth-api uses')
+signer = TokenSigner(token_secret)
+revoked = RevocationList()
+revocation_sync_seconds = float(os.environ.get('REVOCATION_SYNC_SECONDS', '30'))
+auth_api = ServiceClient('auth-api', auth_url, retries=0)
+
+# Users already verified against users-api, so repeat creates for the same
+# user skip the network call
+user_cache = UserCache(
+    ttl=float(os.environ.get('USER_CACHE_TTL', '300')),
+    negative_ttl=float(os.environ.get('USER_CACHE_NEGATIVE_TTL', '30')),
+    max_entries=int(os.environ.get('USER_CACHE_SIZE', '10000')),
+)
+# Keep accepting known users from expired entries while users-api is down
+serve_stale_users = os.environ.get('USER_CACHE_SERVE_STALE', 'false').lower() == 'true'
+
+class UsersUnavailable(Exception):
+    pass
+
+def user_exists(user_id):
+    key = str(user_id)
+    exists = user_cache.get(key)
+    if exists is not None:
+        return exists
+    try:
+        response = users_api.get(f"/users/{user_id}")
+    except requests.RequestException as exc:
+        return stale_user(key, exc)
+    # Only 200 and 404 say anything about the user; a 429 or 401 is about
+    # the call, so it is neither cached nor taken as "no such user"
+    if response.status_code not in (200, 404):
+        return stale_user(key, f"users-api answered {response.status_code}")
+
+    exists = response.status_code == 200
+    user_cache.put(key, exists)
+    return exists
+
+def stale_user(key, reason):
+    stale = user_cache.get(key, stale=True) if serve_stale_users else None
+    if stale is None:
+        raise UsersUnavailable(reason)
+    return stale
+
+def warm_user_cache():
+    try:
+        response = users_api.get("/users")
+        response.raise_for_status()
+        user_cache.warm(str(user["id"]) for user in response.json()["users"])
+    except (requests.RequestException, KeyError, ValueError) as exc:
+        print(f"user cache warm-up failed: {exc}")
+
+def sync_revocations():
+    while True:
+        try:
+            response = auth_api.get('/auth/revoked')
+            response.raise_for_status()
+            revoked.replace(response.json()['revoked'])
+        except (requests.RequestException, KeyError, ValueError) as exc:
+            print(f"revocation sync failed: {exc}")
+        time.sleep(revocation_sync_seconds)
+
+def owns(user_id):
+    # Without REQUIRE_TOKEN there is no caller to compare against
+    return not require_token or str(g.user_id) == str(user_id)
+
+@app.before_request
+def check_token():
+    if not require_token or request.method == 'OPTIONS':
+        return None
+    if request.endpoint in ('health_check', 'metrics'):
+        return None
+    try:
+        claims = signer.verify(bearer_token(request.headers.get('Authorization')), revoked)
+    except InvalidToken as exc:
+        return jsonify({"error": str(exc)}), 401
+    g.user_id = claims["sub"]
+
 @app.route('/healthz', methods=['GET'])
 def health_check():
     return jsonify({"status": "UP", "service": "todos-api"})
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics([users_api, auth_api]), content_type='text/plain; version=0.0.4')
+
 @app.route('/todos', methods=['GET'])
 def get_todos():
     # Get user_id from query parameter
     user_id = request.args.get('user_id', type=int)
+    if require_token:
+        # Callers only ever see their own todos
+        user_id = user_id or g.user_id
+        if not owns(user_id):
+            return jsonify({"error": "Not your todos"}), 403
     
     if user_id:
-        # Filter todos by user_id
-        user_todos = [todo for todo in todos if todo["user_id"] == user_id]
-        return jsonify({"todos": user_todos})
+        # Todos of one user come straight from the per-user index
+        return jsonify({"todos": todos.for_user(user_id)})
     else:
         # Return all todos if no user_id specified
-        return jsonify({"todos": todos})
+        return jsonify({"todos": todos.all()})
 
 @app.route('/todos/<int:todo_id>', methods=['GET'])
 def get_todo(todo_id):
-    todo = next((t for t in todos if t["id"] == todo_id), None)
-    if todo:
+    todo = todos.get(todo_id)
+    if todo and owns(todo["user_id"]):
         return jsonify({"todo": todo})
     return jsonify({"error": "Todo not found"}), 404
 
@@ -47,47 +159,48 @@ def create_todo():
     data = request.get_json()
     if not data or "title" not in data or "user_id" not in data:
         return jsonify({"error": "Missing title or user_id"}), 400
+    if not owns(data["user_id"]):
+        return jsonify({"error": "Cannot create todos for another user"}), 403
     
     # Verify user exists
     try:
-        response = requests.get(f"{users_url}/users/{data['user_id']}")
-        if response.status_code != 200:
+        if not user_exists(data["user_id"]):
             return jsonify({"error": "User not found"}), 404
-    except requests.RequestException:
+    except UsersUnavailable:
         return jsonify({"error": "Could not verify user"}), 503
     
-    new_todo = {
-        "id": len(todos) + 1,
-        "user_id": data["user_id"],
-        "title": data["title"],
-        "completed": False
-    }
-    todos.append(new_todo)
+    new_todo = todos.create(data["user_id"], data["title"])
     return jsonify({"todo": new_todo}), 201
 
 @app.route('/todos/<int:todo_id>', methods=['PUT'])
 def update_todo(todo_id):
-    todo = next((t for t in todos if t["id"] == todo_id), None)
+    data = request.get_json() or {}
+    fields = {key: data[key] for key in ("title", "completed") if key in data}
+    todo = todos.get(todo_id)
+    if todo and owns(todo["user_id"]):
+        todo = todos.update(todo_id, **fields)
+    else:
+        todo = None
     if not todo:
         return jsonify({"error": "Todo not found"}), 404
     
-    data = request.get_json()
-    if "title" in data:
-        todo["title"] = data["title"]
-    if "completed" in data:
-        todo["completed"] = data["completed"]
-    
     return jsonify({"todo": todo})
 
 @app.route('/todos/<int:todo_id>', methods=['DELETE'])
 def delete_todo(todo_id):
-    todo_index = next((i for i, t in enumerate(todos) if t["id"] == todo_id), None)
-    if todo_index is None:
+    todo = todos.get(todo_id)
+    deleted_todo = todos.delete(todo_id) if todo and owns(todo["user_id"]) else None
+    if deleted_todo is None:
         return jsonify({"error": "Todo not found"}), 404
     
-    deleted_todo = todos.pop(todo_index)
     return jsonify({"success": True, "deleted": deleted_todo})
 
+if os.environ.get('USER_CACHE_WARM', 'false').lower() == 'true':
+    threading.Thread(target=warm_user_cache, daemon=True).start()
+
+if require_token and revocation_sync_seconds > 0:
+    threading.Thread(target=sync_revocations, daemon=True).start()
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5003))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Remembers which user ids users-api confirmed or denied.
+
+    Found users are trusted for ``ttl`` seconds and unknown ids (404) for
+    ``negative_ttl``, so a typo'd id does not hit users-api on every retry
+    but a newly created user is not refused for long. At most ``max_entries``
+    ids are kept; the least recently used go first. Expired entries stay
+    until evicted so that get(..., stale=True) can still answer while
+    users-api is down.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=30, max_entries=10000,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # user id -> (exists, expires at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, user_id, stale=False):
+        """True or False if known, None if never seen or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            exists, expires_at = entry
+            if not stale and expires_at <= self._clock():
+                return None
+            self._entries.move_to_end(user_id)
+            return exists
+
+    def put(self, user_id, exists):
+        ttl = self.ttl if exists else self.negative_ttl
+        with self._lock:
+            self._entries[user_id] = (exists, self._clock() + ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def warm(self, user_ids):
+        for user_id in user_ids:
+            self.put(user_id, True)
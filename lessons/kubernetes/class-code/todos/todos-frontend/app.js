@@ -33,6 +33,15 @@ const todosStatus = document.getElementById("todos-status");
 let currentUser = null;
 let currentUserId = localStorage.getItem("currentUserId");
 let currentUsername = localStorage.getItem("currentUsername");
+let currentToken = localStorage.getItem("currentToken");
+
+// Headers for todos-api calls, carrying the session token from auth-api
+function authHeaders(headers = {}) {
+  if (currentToken) {
+    headers["Authorization"] = `Bearer ${currentToken}`;
+  }
+  return headers;
+}
 
 // Check Service Status
 async function checkServiceStatus() {
@@ -86,21 +95,7 @@ async function handleLogin(e) {
   const password = document.getElementById("password").value;
 
   try {
-    // Get all users from users API
-    const usersResponse = await fetch(`${API_URLS.users}/users`);
-    if (!usersResponse.ok) {
-      throw new Error("Failed to get users list");
-    }
-
-    const usersData = await usersResponse.json();
-
-    // Find user based on username
-    const user = usersData.users.find((u) => u.name === username);
-    if (!user) {
-      throw new Error("User not found");
-    }
-
-    // Try to authenticate with auth service
+    // Authenticate with auth service; it answers with the user's id
     const authResponse = await fetch(`${API_URLS.auth}/auth/login`, {
       method: "POST",
       headers: {
@@ -115,14 +110,18 @@ async function handleLogin(e) {
     if (!authResponse.ok) {
       throw new Error("Authentication failed");
     }
+    const authData = await authResponse.json();
 
-    // Store user info
-    currentUser = user;
-    currentUserId = user.id;
+    // Store user info. The id must be the one the token was issued for,
+    // as todos-api checks them against each other.
+    currentUser = { id: authData.user_id, name: username };
+    currentUserId = authData.user_id;
     currentUsername = username;
+    currentToken = authData.token;
 
     localStorage.setItem("currentUserId", currentUserId);
     localStorage.setItem("currentUsername", currentUsername);
+    localStorage.setItem("currentToken", currentToken);
 
     // Update UI
     userNameSpan.textContent = username;
@@ -142,7 +141,8 @@ async function loadTodos() {
 
   try {
     const response = await fetch(
-      `${API_URLS.todos}/todos?user_id=${currentUserId}`
+      `${API_URLS.todos}/todos?user_id=${currentUserId}`,
+      { headers: authHeaders() }
     );
     if (!response.ok) {
       throw new Error("Failed to load todos");
@@ -202,9 +202,9 @@ async function addTodo(title) {
   try {
     const response = await fetch(`${API_URLS.todos}/todos`, {
       method: "POST",
-      headers: {
+      headers: authHeaders({
         "Content-Type": "application/json",
-      },
+      }),
       body: JSON.stringify({
         title,
         user_id: parseInt(currentUserId),
@@ -227,9 +227,9 @@ async function toggleTodo(id, completed) {
   try {
     const response = await fetch(`${API_URLS.todos}/todos/${id}`, {
       method: "PUT",
-      headers: {
+      headers: authHeaders({
         "Content-Type": "application/json",
-      },
+      }),
       body: JSON.stringify({ completed }),
     });
 
@@ -260,6 +260,7 @@ async function deleteTodo(id) {
   try {
     const response = await fetch(`${API_URLS.todos}/todos/${id}`, {
       method: "DELETE",
+      headers: authHeaders(),
     });
 
     if (!response.ok) {
@@ -286,12 +287,12 @@ async function deleteTodo(id) {
 
 // Logout Function
 function logout() {
-  // Call the logout endpoint
+  // Call the logout endpoint so the token is revoked
   fetch(`${API_URLS.auth}/auth/logout`, {
     method: "POST",
-    headers: {
+    headers: authHeaders({
       "Content-Type": "application/json",
-    },
+    }),
     body: JSON.stringify({}),
   }).catch((err) => console.error("Logout error:", err));
 
@@ -299,9 +300,11 @@ function logout() {
   currentUser = null;
   currentUserId = null;
   currentUsername = null;
+  currentToken = null;
 
   localStorage.removeItem("currentUserId");
   localStorage.removeItem("currentUsername");
+  localStorage.removeItem("currentToken");
 
   // Reset forms
   loginForm.reset();
@@ -11,6 +11,11 @@ users = [
     {"id": 3, "name": "omer", "email": "3@3.com"}
 ]
 
+# name -> users with that name, so auth-api can look one name up directly
+users_by_name = {}
+for user in users:
+    users_by_name.setdefault(user["name"], []).append(user)
+
 # base_url = os.environ.get('USERS_API_URL', 'http://localhost:5001')
 
 @app.route('/health', methods=['GET'])
@@ -28,6 +33,13 @@ def get_user(user_id):
         return jsonify({"user": user})
     return jsonify({"error": "User not found"}), 404
 
+@app.route('/users/by-name/<name>', methods=['GET'])
+def get_users_by_name(name):
+    matches = users_by_name.get(name)
+    if matches:
+        return jsonify({"users": matches})
+    return jsonify({"error": "User not found"}), 404
+
 @app.route('/users', methods=['POST'])
 def create_user():
     data = request.get_json()
@@ -40,6 +52,7 @@ def create_user():
         "email": data["email"]
     }
     users.append(new_user)
+    users_by_name.setdefault(new_user["name"], []).append(new_user)
     return jsonify({"user": new_user}), 201
 
 if __name__ == '__main__':
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class RateLimiter:
+    """Token bucket per key: ``rate`` requests a second, bursts up to ``burst``.
+
+    Buckets are refilled lazily when their key is next seen, and only the
+    ``max_keys`` most recently seen keys are kept; a forgotten key starts
+    again with a full bucket, which is what an idle client would have anyway.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        *,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens left, when they were counted)
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for ``key``.
+
+        Returns 0 when admitted, otherwise the seconds until a token frees up.
+        """
+        now = self._clock()
+        with self._lock:
+            tokens, counted = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - counted) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class ConcurrencyLimit:
+    """Counts work in progress and refuses new work beyond ``limit``."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.active
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
@@ -1,25 +1,294 @@
 from __future__ import annotations
 
+import base64
+import heapq
+import itertools
+import json
+import math
 import os
 import random
-import sqlite3
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+from flask import (
+    Flask,
+    Response,
+    g,
+    jsonify,
+    request,
+    stream_with_context,
+)
+
+import admission
+import cache
+import events
+import export
+import fingerprints
+import jobs
+import metrics
+import retention
+import search
+import shards
+import stats
+import writer
+from db import ConnectionPool, utc_timestamp
+
+if TYPE_CHECKING:
+    import engine
 
 BASE_DIR = Path(__file__).parent
-DB_PATH = BASE_DIR / "autoscan.db"
+DB_PATH = Path(os.environ.get("AUTOSCAN_DB_PATH", BASE_DIR / "autoscan.db"))
+DB_POOL_SIZE = int(os.environ.get("AUTOSCAN_DB_POOL_SIZE", "8"))
+REGIONS = [
+    region.strip()
+    for region in os.environ.get("AUTOSCAN_REGIONS", "").split(",")
+    if region.strip()
+]
+HOME_REGION = os.environ.get("AUTOSCAN_REGION") or (
+    REGIONS[0] if REGIONS else "default"
+)
+SCAN_WORKERS = int(os.environ.get("AUTOSCAN_WORKERS", "4"))
+SCAN_QUEUE_DEPTH = int(os.environ.get("AUTOSCAN_QUEUE_DEPTH", "1000"))
+JOB_LEASE = float(os.environ.get("AUTOSCAN_JOB_LEASE", "60"))
+BATCH_LIMIT = int(os.environ.get("AUTOSCAN_BATCH_LIMIT", "10000"))
+RESPONSE_CACHE_SIZE = int(
+    os.environ.get("AUTOSCAN_RESPONSE_CACHE_SIZE", "256")
+)
+GROUP_COMMIT_MS = float(os.environ.get("AUTOSCAN_GROUP_COMMIT_MS", "0"))
+GROUP_COMMIT_ROWS = int(os.environ.get("AUTOSCAN_GROUP_COMMIT_ROWS", "256"))
+ARCHIVE_DIR = Path(
+    os.environ.get("AUTOSCAN_ARCHIVE_DIR", BASE_DIR / "archive")
+)
+RETENTION_DAYS = int(os.environ.get("AUTOSCAN_RETENTION_DAYS", "0"))
+RETENTION_INTERVAL = float(
+    os.environ.get("AUTOSCAN_RETENTION_INTERVAL", "3600")
+)
+IDEMPOTENCY_TTL = float(os.environ.get("AUTOSCAN_IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_KEYS = int(os.environ.get("AUTOSCAN_IDEMPOTENCY_KEYS", "10000"))
+RESULT_TTL = float(os.environ.get("AUTOSCAN_RESULT_TTL", "0"))
+RESULT_CACHE_SIZE = int(os.environ.get("AUTOSCAN_RESULT_CACHE_SIZE", "1024"))
+STREAM_MAX_CLIENTS = int(os.environ.get("AUTOSCAN_STREAM_MAX_CLIENTS", "100"))
+STREAM_BUFFER = int(os.environ.get("AUTOSCAN_STREAM_BUFFER", "256"))
+STREAM_HEARTBEAT = float(os.environ.get("AUTOSCAN_STREAM_HEARTBEAT", "15"))
+STREAM_BACKLOG = 1000
+SCAN_ENGINE = os.environ.get("AUTOSCAN_ENGINE", "simulated")
+SCAN_PORTS = tuple(
+    int(port)
+    for port in os.environ.get("AUTOSCAN_SCAN_PORTS", "80,443").split(",")
+)
+SCAN_CONCURRENCY = int(os.environ.get("AUTOSCAN_SCAN_CONCURRENCY", "200"))
+SCAN_HOST_RATE = float(os.environ.get("AUTOSCAN_SCAN_HOST_RATE", "5"))
+SCAN_CONNECT_TIMEOUT = float(
+    os.environ.get("AUTOSCAN_SCAN_CONNECT_TIMEOUT", "3")
+)
+SCAN_TARGET_TIMEOUT = float(
+    os.environ.get("AUTOSCAN_SCAN_TARGET_TIMEOUT", "10")
+)
+SCAN_TLS_WARN_DAYS = int(os.environ.get("AUTOSCAN_SCAN_TLS_WARN_DAYS", "14"))
+SCAN_CA_FILE = os.environ.get("AUTOSCAN_SCAN_CA_FILE") or None
+FINGERPRINT_MAX_AGE = float(
+    os.environ.get("AUTOSCAN_FINGERPRINT_MAX_AGE", str(7 * 86400))
+)
+
+RATE_LIMIT = float(os.environ.get("AUTOSCAN_RATE_LIMIT", "0"))
+RATE_BURST = int(os.environ.get("AUTOSCAN_RATE_BURST", "20"))
+RATE_CLIENT_HEADER = os.environ.get("AUTOSCAN_RATE_CLIENT_HEADER") or None
+MAX_INFLIGHT_SCANS = int(os.environ.get("AUTOSCAN_MAX_INFLIGHT_SCANS", "64"))
+SCAN_STATUSES = ("passed", "warning", "failed")
+SCAN_ENGINES = ("simulated", "network")
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+
+# One SQLite database per region (AUTOSCAN_REGIONS); jobs live in the home one.
+_shards: shards.ShardSet | None = None
+_jobs: jobs.JobQueue | None = None
+# region -> group-commit writer for insert_scan, when AUTOSCAN_GROUP_COMMIT_MS
+# is set.
+_writers: dict[str, writer.GroupCommitWriter[dict]] = {}
+# Set once warm_up() has created the schema and started the workers above.
+_warm = False
+_warm_lock = threading.Lock()
+# Endpoints that answer without touching the database, so they never wait
+# for warm_up(): probes and the env page stay fast on a cold pod.
+COLD_ENDPOINTS = {"health", "env_snapshot", "prometheus_metrics"}
+_retention: retention.RetentionWorker | None = None
+# Set when AUTOSCAN_ENGINE=network; simulate_scan delegates to it.
+_engine: engine.NetworkEngine | None = None
+
+# Serialized GET /api/scans pages; every committed insert bumps its generation.
+scan_cache = cache.ResponseCache(RESPONSE_CACHE_SIZE)
+# Idempotency-Key -> ((target, automation_mode), job id) of the first request.
+idempotency_keys = cache.TTLCache(IDEMPOTENCY_KEYS, IDEMPOTENCY_TTL)
+# (target, automation_mode) -> job id of the latest submission, reused while
+# RESULT_TTL lasts so resubmitted scans are not run again.
+recent_results = cache.TTLCache(RESULT_CACHE_SIZE, RESULT_TTL)
+_submit_lock = threading.Lock()
+
+# Admission control for write requests; reads (GET) are never throttled, so
+# they keep their latency while a burst of submissions is being shed.
+ADMISSION_METHODS = {"POST"}
+SCAN_ENDPOINTS = {"create_scan", "create_scan_batch"}
+# (client, route) -> token bucket, when AUTOSCAN_RATE_LIMIT is set.
+rate_limits = admission.RateLimiter(RATE_LIMIT, RATE_BURST)
+# Scan submissions being handled; batches scan every target before answering.
+scans_in_flight = admission.ConcurrencyLimit(MAX_INFLIGHT_SCANS)
+
+REQUEST_SECONDS = "autoscan_http_request_duration_seconds"
+REQUEST_ERRORS = "autoscan_http_request_errors_total"
+REQUESTS_IN_FLIGHT = "autoscan_http_requests_in_flight"
+DB_SECONDS = "autoscan_db_query_duration_seconds"
+STREAM_EVICTIONS = "autoscan_stream_evictions_total"
+ADMISSION_REJECTIONS = "autoscan_admission_rejections_total"
+RETENTION_ERRORS = "autoscan_retention_errors_total"
+
+registry = metrics.Registry()
+registry.histogram(
+    REQUEST_SECONDS, "HTTP request latency.", ("route", "method")
+)
+registry.counter(
+    REQUEST_ERRORS,
+    "HTTP responses with a 4xx or 5xx status.",
+    ("route", "method", "status"),
+)
+registry.gauge(REQUESTS_IN_FLIGHT, "HTTP requests being served.")
+registry.histogram(DB_SECONDS, "Time spent in SQLite calls.", ("operation",))
+registry.gauge(
+    "autoscan_scan_queue_depth",
+    "Scan jobs waiting for a worker.",
+    callback=lambda: _jobs.qsize() if _jobs is not None else 0,
+)
+registry.counter(
+    STREAM_EVICTIONS, "Scan stream clients dropped for falling behind."
+)
+registry.counter(RETENTION_ERRORS, "Retention passes that raised an error.")
+
+# Live feed for GET /api/scans/stream; inserts publish after they commit.
+scan_events = events.Broadcaster(
+    max_pending=STREAM_BUFFER,
+    max_subscribers=STREAM_MAX_CLIENTS,
+    on_evict=lambda: registry.inc(STREAM_EVICTIONS),
+)
+registry.counter(
+    ADMISSION_REJECTIONS,
+    "Write requests refused by rate or concurrency limits.",
+    ("route", "reason"),
+)
+registry.gauge(
+    "autoscan_scan_requests_in_flight",
+    "Scan submissions being handled.",
+    callback=lambda: len(scans_in_flight),
+)
+registry.gauge(
+    "autoscan_stream_clients",
+    "Open GET /api/scans/stream connections.",
+    callback=lambda: len(scan_events),
+)
+
+
+def create_app(db_path: Path | None = None) -> Flask:
+    """Build the Flask app without touching the database.
 
+    The schema, job workers, scan engine and retention start in warm_up(),
+    which the first request that needs them runs.
+    """
+    global _shards, _jobs, _retention, _engine, _warm
+    from flask_cors import CORS
+
+    if SCAN_ENGINE not in SCAN_ENGINES:
+        raise ValueError(
+            f"AUTOSCAN_ENGINE must be one of {', '.join(SCAN_ENGINES)}"
+        )
 
-def create_app() -> Flask:
     app = Flask(__name__)
-    CORS(app)
+    # Browsers only let scripts read Retry-After when it is exposed.
+    CORS(app, expose_headers=["Retry-After"])
     app.config["JSON_SORT_KEYS"] = False
 
-    init_db()
+    if _retention is not None:
+        _retention.stop()
+        _retention = None
+    if _jobs is not None:
+        _jobs.stop()
+        _jobs = None
+    if _engine is not None:
+        _engine.stop()
+        _engine = None
+    for group_writer in _writers.values():
+        group_writer.stop()
+    _writers.clear()
+    if _shards is not None:
+        _shards.close()
+    # Opening a ShardSet only records paths; connections open on first use.
+    _shards = shards.ShardSet(
+        db_path or DB_PATH, REGIONS, home=HOME_REGION, size=DB_POOL_SIZE
+    )
+    _warm = False
+    # Nothing in /api/env changes while the process runs.
+    env_body = json.dumps(env_snapshot_values(), sort_keys=True)
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_started = time.perf_counter()
+        registry.inc(REQUESTS_IN_FLIGHT)
+
+    @app.before_request
+    def admit_request():
+        if request.method not in ADMISSION_METHODS:
+            return None
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        if RATE_LIMIT > 0:
+            wait = rate_limits.acquire((client_id(), route))
+            if wait:
+                registry.inc(ADMISSION_REJECTIONS, (route, "rate"))
+                return (
+                    jsonify({"error": "rate limit exceeded"}),
+                    429,
+                    {"Retry-After": str(math.ceil(wait))},
+                )
+        if request.endpoint in SCAN_ENDPOINTS and MAX_INFLIGHT_SCANS > 0:
+            if not scans_in_flight.try_acquire():
+                registry.inc(ADMISSION_REJECTIONS, (route, "in_flight"))
+                return (
+                    jsonify(
+                        {
+                            "error": "too many scans in flight "
+                            f"({scans_in_flight.limit})"
+                        }
+                    ),
+                    503,
+                    {"Retry-After": "1"},
+                )
+            g.scan_admitted = True
+        return None
+
+    @app.before_request
+    def ensure_warm():
+        if request.endpoint not in COLD_ENDPOINTS:
+            warm_up()
+
+    @app.after_request
+    def record_request_metrics(response):
+        elapsed = time.perf_counter() - g.request_started
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        registry.observe(REQUEST_SECONDS, (route, request.method), elapsed)
+        if response.status_code >= 400:
+            labels = (route, request.method, response.status_code)
+            registry.inc(REQUEST_ERRORS, labels)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        registry.inc(REQUESTS_IN_FLIGHT, value=-1)
+        if g.pop("scan_admitted", False):
+            scans_in_flight.release()
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        return Response(registry.render(), content_type=metrics.CONTENT_TYPE)
 
     @app.route("/api/health", methods=["GET"])
     def health():
@@ -27,54 +296,338 @@ def create_app() -> Flask:
 
     @app.route("/api/scans", methods=["GET"])
     def list_scans():
-        rows = fetch_scans()
-        return jsonify({"items": rows})
+        key = tuple(sorted(request.args.items(multi=True)))
+        generation = scan_cache.generation
+        entry = scan_cache.get(key)
+        if entry is None:
+            try:
+                query = parse_scan_query(request.args)
+            except ValueError as exc:
+                return jsonify({"error": str(exc)}), 400
+
+            rows, next_cursor = fetch_scans(**query)
+            body = json.dumps({"items": rows, "nextCursor": next_cursor})
+            entry = scan_cache.put(key, generation, body.encode())
+
+        response = Response(entry.body, mimetype="application/json")
+        response.set_etag(entry.etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
 
     @app.route("/api/scans", methods=["POST"])
     def create_scan():
         data = request.get_json(force=True, silent=True) or {}
         target = (data.get("target") or "").strip() or "internal"
         automation_mode = (data.get("automationMode") or "automated").lower()
+        region = data.get("region") or None
+        key = request.headers.get("Idempotency-Key")
+        if key is not None and not 1 <= len(key) <= 255:
+            return (
+                jsonify({"error": "Idempotency-Key must be 1-255 characters"}),
+                400,
+            )
+
+        try:
+            get_shards().pool(region)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        try:
+            job_id, replayed = submit_scan(
+                _jobs, target, automation_mode, key, region
+            )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 422
+        except jobs.QueueFull as exc:
+            return jsonify({"error": str(exc)}), 503, {"Retry-After": "1"}
+
+        headers = {"Location": f"/api/scans/{job_id}"}
+        state = "queued"
+        if replayed:
+            headers["Idempotent-Replayed"] = "true"
+            job = _jobs.get(job_id)
+            state = job["state"] if job else state
+        return jsonify({"id": job_id, "state": state}), 202, headers
+
+    @app.route("/api/scans/batch", methods=["POST"])
+    def create_scan_batch():
+        data = request.get_json(force=True, silent=True) or {}
+        region = data.get("region") or None
+        try:
+            requested = parse_batch(data)
+            get_shards().pool(region)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        if data.get("incremental"):
+            scan_ids, skipped = rescan(requested, region)
+        else:
+            scan_ids = insert_scans(
+                findings_rows(requested, scan_targets(requested)), region
+            )
+            skipped = 0
+        return (
+            jsonify(
+                {"count": len(scan_ids), "ids": scan_ids, "skipped": skipped}
+            ),
+            201,
+        )
 
-        findings = simulate_scan(target, automation_mode)
-        scan_id = insert_scan(
-            target=target,
-            automation_mode=automation_mode,
-            status=findings["status"],
-            summary=findings["summary"],
+    @app.route("/api/scans/stream", methods=["GET"])
+    def stream_scans():
+        last_event_id = request.headers.get(
+            "Last-Event-ID", request.args.get("lastEventId")
         )
+        try:
+            after_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return jsonify({"error": "Last-Event-ID must be a scan id"}), 400
+
+        try:
+            subscription = scan_events.subscribe()
+        except events.TooManySubscribers as exc:
+            return jsonify({"error": str(exc)}), 503, {"Retry-After": "5"}
+        try:
+            # A reconnecting client catches up on what it missed in one read.
+            backlog = (
+                fetch_scans_after(after_id) if after_id is not None else []
+            )
+        except BaseException:
+            scan_events.unsubscribe(subscription)
+            raise
+        response = Response(
+            scan_events.stream(
+                subscription, backlog, heartbeat=STREAM_HEARTBEAT
+            ),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        # The stream's own cleanup never runs if the server closes the
+        # response before the first chunk is pulled.
+        response.call_on_close(lambda: scan_events.unsubscribe(subscription))
+        return response
+
+    @app.route("/api/scans/export", methods=["GET"])
+    def export_scans():
+        fmt = request.args.get("format", "ndjson")
+        if fmt not in export.FORMATS:
+            choices = ", ".join(export.FORMATS)
+            return jsonify({"error": f"format must be one of {choices}"}), 400
+
+        body = export.render(
+            fmt,
+            retention.iter_history(
+                list(get_shards().pools.values()), ARCHIVE_DIR
+            ),
+        )
+        return Response(
+            stream_with_context(body),
+            mimetype=export.FORMATS[fmt],
+            headers={
+                "Content-Disposition": f"attachment; filename=scan_runs.{fmt}"
+            },
+        )
+
+    @app.route("/api/scans/search", methods=["GET"])
+    def search_scans():
+        try:
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+            offset = int(request.args.get("offset", 0))
+        except ValueError:
+            return jsonify({"error": "limit and offset must be integers"}), 400
+        if not 1 <= limit <= MAX_PAGE_SIZE or offset < 0:
+            return jsonify({"error": "limit or offset out of range"}), 400
+
+        try:
+            items = search_scans_page(
+                request.args.get("q", ""), limit=limit, offset=offset
+            )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
 
-        return jsonify({"id": scan_id, "result": findings}), 201
+        next_offset = offset + limit
+        if len(items) < limit or next_offset >= search.WINDOW:
+            next_offset = None
+        return jsonify({"items": items, "nextOffset": next_offset})
+
+    @app.route("/api/scans/stats", methods=["GET"])
+    def scan_stats():
+        dimension = request.args.get("dimension", "day")
+        if dimension not in stats.DIMENSIONS:
+            choices = ", ".join(stats.DIMENSIONS)
+            return (
+                jsonify({"error": f"dimension must be one of {choices}"}),
+                400,
+            )
+        try:
+            since = parse_timestamp(request.args.get("since"), "since")
+            until = parse_timestamp(request.args.get("until"), "until")
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        def fetch_stats(region, pool):
+            with pool.connection() as conn:
+                return stats.fetch(conn, dimension, since=since, until=until)
+
+        buckets = stats.merge(get_shards().map(fetch_stats))
+        return jsonify({"dimension": dimension, "buckets": buckets})
+
+    @app.route("/api/scans/stats/rebuild", methods=["POST"])
+    def rebuild_scan_stats():
+        shard_set = get_shards()
+        counters = 0
+        # Archived rows count towards the shard their id was allocated in.
+        for region, pool in shard_set.pools.items():
+            archived = (
+                (row[1], row[2], row[3], row[5])
+                for chunk in retention.iter_archived_chunks(ARCHIVE_DIR)
+                for row in chunk
+                if shard_set.region_of(row[0]) == region
+            )
+            with pool.connection() as conn:
+                counters += stats.rebuild(conn, archived)
+        return jsonify({"rebuilt": True, "counters": counters})
+
+    @app.route("/api/scans/<int:job_id>", methods=["GET"])
+    def get_scan_job(job_id: int):
+        job = _jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Scan job not found"}), 404
+        job["scan"] = fetch_scan(job["scan_id"]) if job["scan_id"] else None
+        return jsonify(job)
 
     @app.route("/api/env", methods=["GET"])
     def env_snapshot():
-        allowed_keys = {
-            "ENV",
-            "PYTHONPATH",
-            "FLASK_ENV",
-            "AUTOSCAN_PROFILE",
-            "AUTOSCAN_REGION",
-        }
-        env_values = {
-            key: os.environ.get(key, "")
-            for key in sorted(allowed_keys)
-            if os.environ.get(key)
-        }
-        return jsonify(
-            {
-                "python_version": sys.version,
-                "working_directory": str(os.getcwd()),
-                "database_path": str(DB_PATH),
-                "exposed_env": env_values,
-            }
-        )
+        return Response(env_body, mimetype="application/json")
 
     return app
 
 
+def client_id() -> str:
+    """Who a rate limit applies to.
+
+    That is AUTOSCAN_RATE_CLIENT_HEADER when the request carries it (set by a
+    trusted ingress), else the peer address.
+    """
+    if RATE_CLIENT_HEADER is not None:
+        value = request.headers.get(RATE_CLIENT_HEADER, "")
+        if value:
+            return value.split(",")[0].strip()
+    return request.remote_addr or "unknown"
+
+
+def env_snapshot_values() -> dict:
+    allowed_keys = {
+        "ENV",
+        "PYTHONPATH",
+        "FLASK_ENV",
+        "AUTOSCAN_PROFILE",
+        "AUTOSCAN_REGION",
+    }
+    env_values = {
+        key: os.environ.get(key, "")
+        for key in sorted(allowed_keys)
+        if os.environ.get(key)
+    }
+    return {
+        "python_version": sys.version,
+        "working_directory": str(os.getcwd()),
+        "database_path": str(get_pool().path),
+        "region": get_shards().home,
+        "shards": {
+            region: str(pool.path)
+            for region, pool in get_shards().pools.items()
+        },
+        "exposed_env": env_values,
+    }
+
+
+def warm_up() -> None:
+    """Create the schema and start the background workers, once.
+
+    Requests run this on demand; call it directly (as ``python app.py``
+    does from a background thread) to get it out of the way before traffic
+    arrives.
+    """
+    global _jobs, _retention, _engine, _warm
+    if _warm:
+        return
+    with _warm_lock:
+        if _warm:
+            return
+        shard_set = get_shards()
+        init_db()
+        if GROUP_COMMIT_MS > 0:
+            for region, pool in shard_set.pools.items():
+                _writers[region] = writer.GroupCommitWriter(
+                    pool,
+                    write_scans,
+                    interval=GROUP_COMMIT_MS / 1000,
+                    max_rows=GROUP_COMMIT_ROWS,
+                    on_commit=scans_committed,
+                    name=f"group-commit-{region}",
+                )
+                _writers[region].start()
+
+        if SCAN_ENGINE == "network":
+            import engine
+
+            _engine = engine.NetworkEngine(
+                ports=SCAN_PORTS,
+                concurrency=SCAN_CONCURRENCY,
+                host_rate=SCAN_HOST_RATE,
+                connect_timeout=SCAN_CONNECT_TIMEOUT,
+                target_timeout=SCAN_TARGET_TIMEOUT,
+                tls_warn_days=SCAN_TLS_WARN_DAYS,
+                ca_file=SCAN_CA_FILE,
+            )
+            _engine.start()
+
+        _jobs = jobs.JobQueue(
+            shard_set.pool(),
+            run_scan,
+            workers=SCAN_WORKERS,
+            depth=SCAN_QUEUE_DEPTH,
+            lease=JOB_LEASE,
+        )
+        _jobs.start()
+
+        if RETENTION_DAYS > 0:
+            _retention = retention.RetentionWorker(
+                list(shard_set.pools.values()),
+                ARCHIVE_DIR,
+                days=RETENTION_DAYS,
+                interval=RETENTION_INTERVAL,
+                on_batch=scan_cache.bump,
+                on_error=lambda exc: registry.inc(RETENTION_ERRORS),
+            )
+            _retention.start()
+        _warm = True
+
+
+def get_shards() -> shards.ShardSet:
+    global _shards
+    if _shards is None:
+        _shards = shards.ShardSet(
+            DB_PATH, REGIONS, home=HOME_REGION, size=DB_POOL_SIZE
+        )
+    return _shards
+
+
+def get_pool() -> ConnectionPool:
+    """The home region's database, which also holds the job queue."""
+    return get_shards().pool()
+
+
 def init_db() -> None:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(DB_PATH) as conn:
+    shard_set = get_shards()
+    for region, pool in shard_set.pools.items():
+        init_shard(pool, shard_set.id_base(region))
+
+
+def init_shard(pool: ConnectionPool, id_base: int) -> None:
+    """Create the schema in one shard and start its ids at ``id_base``."""
+    with pool.connection() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS scan_runs (
@@ -87,39 +640,538 @@ def init_db() -> None:
             )
             """
         )
+        jobs.init_schema(conn)
+        fingerprints.init_schema(conn)
+        stats_created = stats.init_schema(conn)
+        search_created = search.init_schema(conn)
+        # Every listing filter is an equality prefix followed by the
+        # (created_at, id) keyset, so each index serves one filter without a sort.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scan_runs_created "
+            "ON scan_runs (created_at, id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scan_runs_status "
+            "ON scan_runs (status, created_at, id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scan_runs_target "
+            "ON scan_runs (target, created_at, id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scan_runs_mode "
+            "ON scan_runs (automation_mode, created_at, id)"
+        )
+        seq = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'scan_runs'"
+        ).fetchone()
+        if seq is None:
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('scan_runs', ?)",
+                (id_base,),
+            )
+        elif not id_base <= seq[0] < id_base + (1 << shards.ID_BITS):
+            raise ValueError(
+                f"{pool.path} holds ids outside its region's range; "
+                "AUTOSCAN_REGIONS may only be appended to"
+            )
         conn.commit()
+        if stats_created:
+            stats.rebuild(conn)
+        if search_created:
+            search.rebuild(conn)
+
+
+def submit_scan(
+    job_queue: jobs.JobQueue,
+    target: str,
+    automation_mode: str,
+    idempotency_key: str | None = None,
+    region: str | None = None,
+) -> tuple[int, bool]:
+    """Queue a scan unless an earlier job already answers this submission.
+
+    A repeated ``idempotency_key`` returns its original job, and with
+    RESULT_TTL set the same (target, mode) reuses its latest job that has
+    not failed. Returns (job id, replayed). Raises ValueError if the key was
+    first used for a different target or mode.
+    """
+    scan_key = (target, automation_mode, region)
+    if idempotency_key is None and RESULT_TTL <= 0:
+        return job_queue.submit(target, automation_mode, region), False
+
+    # Lookup and submit must not interleave, or two retries racing each
+    # other would both miss and queue twice.
+    with _submit_lock:
+        if idempotency_key is not None:
+            seen = idempotency_keys.get(idempotency_key)
+            if seen is not None:
+                if seen[0] != scan_key:
+                    raise ValueError(
+                        "Idempotency-Key was already used for a different scan"
+                    )
+                return seen[1], True
+
+        job_id = recent_results.get(scan_key) if RESULT_TTL > 0 else None
+        if job_id is not None:
+            job = job_queue.get(job_id)
+            if job is None or job["state"] == "failed":
+                recent_results.discard(scan_key)
+                job_id = None
+        replayed = job_id is not None
+        if job_id is None:
+            job_id = job_queue.submit(target, automation_mode, region)
+            if RESULT_TTL > 0:
+                recent_results.put(scan_key, job_id)
+
+        if idempotency_key is not None:
+            idempotency_keys.put(idempotency_key, (scan_key, job_id))
+        return job_id, replayed
+
+
+def encode_cursor(created_at: str, scan_id: int) -> str:
+    raw = f"{created_at}|{scan_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, scan_id = (
+            base64.urlsafe_b64decode(padded).decode().split("|")
+        )
+        return created_at, int(scan_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def parse_scan_query(args) -> dict:
+    """Validate GET /api/scans query parameters into fetch_scans keywords."""
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError as exc:
+        raise ValueError("limit must be an integer") from exc
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    status = args.get("status") or None
+    if status is not None and status not in SCAN_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(SCAN_STATUSES)}")
+
+    query = {
+        "limit": limit,
+        "cursor": (
+            decode_cursor(args["cursor"]) if args.get("cursor") else None
+        ),
+        "status": status,
+        "target": args.get("target") or None,
+        "automation_mode": (args.get("automationMode") or "").lower() or None,
+        "region": args.get("region") or None,
+    }
+    if query["region"] is not None:
+        get_shards().pool(query["region"])
+    for key in ("since", "until"):
+        query[key] = parse_timestamp(args.get(key), key)
+    return query
+
 
+def parse_timestamp(value: str | None, name: str) -> str | None:
+    if not value:
+        return None
+    try:
+        return utc_timestamp(datetime.fromisoformat(value))
+    except ValueError as exc:
+        raise ValueError(f"{name} must be an ISO-8601 timestamp") from exc
 
-def fetch_scans() -> list[dict]:
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute(
+
+def parse_batch(data: dict) -> list[tuple[str, str]]:
+    """Validate a batch body into (target, automation_mode) pairs.
+
+    ``targets`` items are either target strings, which use the batch-level
+    ``automationMode``, or objects with their own ``target``/``automationMode``.
+    """
+    targets = data.get("targets")
+    if not isinstance(targets, list) or not targets:
+        raise ValueError("targets must be a non-empty array")
+    if len(targets) > BATCH_LIMIT:
+        raise ValueError(f"a batch accepts at most {BATCH_LIMIT} targets")
+
+    default_mode = (data.get("automationMode") or "automated").lower()
+    requested = []
+    for item in targets:
+        if isinstance(item, dict):
+            target = item.get("target")
+            automation_mode = (
+                item.get("automationMode") or default_mode
+            ).lower()
+        else:
+            target, automation_mode = item, default_mode
+        if not isinstance(target, str):
+            raise ValueError("each target must be a string")
+        requested.append((target.strip() or "internal", automation_mode))
+    return requested
+
+
+def fetch_scans(
+    *,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: tuple[str, int] | None = None,
+    status: str | None = None,
+    target: str | None = None,
+    automation_mode: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    region: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """Return one page of scans, newest first, and the cursor for the next page.
+
+    Without ``region`` every shard is read concurrently and the per-shard
+    pages, each already in (created_at, id) order, are k-way merged. Ids are
+    unique across shards, so the cursor means the same thing in all of them.
+    """
+    clauses, params = [], []
+    for column, value in (
+        ("status", status),
+        ("target", target),
+        ("automation_mode", automation_mode),
+    ):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    if cursor is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(cursor)
+
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    sql = (
+        "SELECT id, target, automation_mode, status, summary, created_at "
+        f"FROM scan_runs {where}"
+        "ORDER BY created_at DESC, id DESC LIMIT ?"
+    )
+
+    def fetch_shard(region, pool):
+        with pool.connection() as conn:
+            return conn.execute(sql, (*params, limit + 1)).fetchall()
+
+    timer = registry.time(DB_SECONDS, ("fetch_scans",))
+    with timer:
+        pages = get_shards().map(
+            fetch_shard, [region] if region is not None else None
+        )
+    rows = list(
+        itertools.islice(
+            heapq.merge(*pages, key=_scan_order, reverse=True), limit + 1
+        )
+    )
+
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return items, next_cursor
+
+
+def _scan_order(row) -> tuple[str, int]:
+    return row["created_at"], row["id"]
+
+
+def fetch_scan(scan_id: int) -> dict | None:
+    pool = get_shards().pool_for_id(scan_id)
+    if pool is None:
+        return None
+    with pool.connection() as conn:
+        row = conn.execute(
             "SELECT id, target, automation_mode, status, summary, created_at "
-            "FROM scan_runs ORDER BY created_at DESC LIMIT 20"
-        ).fetchall()
-        return [dict(row) for row in rows]
+            "FROM scan_runs WHERE id = ?",
+            (scan_id,),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def fetch_scans_after(scan_id: int, limit: int = STREAM_BACKLOG) -> list[dict]:
+    """Oldest ``limit`` scans recorded after ``scan_id``, across every shard.
+
+    Rows come in (created_at, id) order; empty if ``scan_id`` is unknown.
+    """
+    anchor = fetch_scan(scan_id)
+    if anchor is None:
+        return []
+
+    def fetch_shard(region, pool):
+        with pool.connection() as conn:
+            return conn.execute(
+                "SELECT id, target, automation_mode, status, summary, "
+                "created_at FROM scan_runs WHERE (created_at, id) > (?, ?) "
+                "ORDER BY created_at, id LIMIT ?",
+                (anchor["created_at"], scan_id, limit),
+            ).fetchall()
+
+    rows = heapq.merge(*get_shards().map(fetch_shard), key=_scan_order)
+    return [dict(row) for row in itertools.islice(rows, limit)]
+
+
+def search_scans_page(text: str, *, limit: int, offset: int) -> list[dict]:
+    """One page of search.search() results ranked across every shard."""
+
+    def search_shard(region, pool):
+        with pool.connection() as conn:
+            return search.search(conn, text, limit=offset + limit)
+
+    # Each shard ranks ties by id, which only orders scans within that shard,
+    # so re-sort the union by (score, created_at, id) instead of merging.
+    items = sorted(
+        itertools.chain.from_iterable(get_shards().map(search_shard)),
+        key=lambda item: (item["score"], item["created_at"], item["id"]),
+        reverse=True,
+    )
+    return items[offset : offset + limit]
+
+
+INSERT_SCAN_SQL = """
+    INSERT INTO scan_runs (target, automation_mode, status, summary, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
 
 
 def insert_scan(
-    *, target: str, automation_mode: str, status: str, summary: str
+    *,
+    target: str,
+    automation_mode: str,
+    status: str,
+    summary: str,
+    region: str | None = None,
 ) -> int:
-    created_at = datetime.utcnow().isoformat() + "Z"
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.execute(
-            """
-            INSERT INTO scan_runs (target, automation_mode, status, summary, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (target, automation_mode, status, summary, created_at),
+    """Record one scan in ``region``'s shard (the home region by default).
+
+    With AUTOSCAN_GROUP_COMMIT_MS set the row goes through that shard's
+    group-commit writer, and this returns once the shared commit is done.
+    """
+    pool = get_shards().pool(region)
+    row = {
+        "target": target,
+        "automation_mode": automation_mode,
+        "status": status,
+        "summary": summary,
+        "created_at": utc_timestamp(),
+    }
+    timer = registry.time(DB_SECONDS, ("insert_scan",))
+    group_writer = _writers.get(region or get_shards().home)
+    if group_writer is not None:
+        with timer:
+            return group_writer.submit(row).result()
+
+    with timer, pool.connection() as conn:
+        (scan_id,) = write_scans(conn, [row])
+        conn.commit()
+    scans_committed([row], [scan_id])
+    return scan_id
+
+
+def write_scans(conn, rows: list[dict]) -> list[int]:
+    """Insert scan rows on ``conn`` without committing; returns their ids."""
+    scan_ids = [
+        conn.execute(
+            INSERT_SCAN_SQL,
+            (
+                row["target"],
+                row["automation_mode"],
+                row["status"],
+                row["summary"],
+                row["created_at"],
+            ),
+        ).lastrowid
+        for row in rows
+    ]
+    stats.record(
+        conn,
+        (
+            (
+                row["target"],
+                row["automation_mode"],
+                row["status"],
+                row["created_at"],
+            )
+            for row in rows
+        ),
+    )
+    return scan_ids
+
+
+def scans_committed(rows: list[dict], scan_ids: list[int]) -> None:
+    """Invalidate cached pages and publish rows that just committed."""
+    scan_cache.bump()
+    scan_events.publish(
+        {"id": scan_id, **row} for scan_id, row in zip(scan_ids, rows)
+    )
+
+
+def insert_scans(rows: list[dict], region: str | None = None) -> list[int]:
+    """Insert many scans in one transaction and return their ids in order."""
+    created_at = utc_timestamp()
+    timer = registry.time(DB_SECONDS, ("insert_scans",))
+    with timer, get_shards().pool(region).connection() as conn:
+        # BEGIN IMMEDIATE takes the write lock up front, so no other writer can
+        # interleave and the AUTOINCREMENT ids of this batch are contiguous.
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            INSERT_SCAN_SQL,
+            (
+                (
+                    row["target"],
+                    row["automation_mode"],
+                    row["status"],
+                    row["summary"],
+                    created_at,
+                )
+                for row in rows
+            ),
+        )
+        stats.record(
+            conn,
+            (
+                (
+                    row["target"],
+                    row["automation_mode"],
+                    row["status"],
+                    created_at,
+                )
+                for row in rows
+            ),
         )
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
         conn.commit()
-        return cursor.lastrowid
+    scan_cache.bump()
+    scan_ids = list(range(last_id - len(rows) + 1, last_id + 1))
+    scan_events.publish(
+        {
+            "id": scan_id,
+            "target": row["target"],
+            "automation_mode": row["automation_mode"],
+            "status": row["status"],
+            "summary": row["summary"],
+            "created_at": created_at,
+        }
+        for scan_id, row in zip(scan_ids, rows)
+    )
+    return scan_ids
+
+
+def run_scan(target: str, automation_mode: str, region: str | None) -> int:
+    """Scan a target and record the result; executed by the job workers."""
+    findings = simulate_scan(target, automation_mode)
+    return insert_scan(
+        target=target,
+        automation_mode=automation_mode,
+        status=findings["status"],
+        summary=findings["summary"],
+        region=region,
+    )
+
+
+def scan_targets(requested: list[tuple[str, str]]) -> list[dict]:
+    """Findings for many (target, automation_mode) pairs, in input order.
+
+    The network engine checks them all concurrently.
+    """
+    if _engine is not None:
+        return _engine.scan_many(requested)
+    return [simulate_scan(target, mode) for target, mode in requested]
+
+
+def findings_rows(
+    requested: list[tuple[str, str]], findings: list[dict]
+) -> list[dict]:
+    return [
+        {
+            "target": target,
+            "automation_mode": automation_mode,
+            "status": result["status"],
+            "summary": result["summary"],
+        }
+        for (target, automation_mode), result in zip(requested, findings)
+    ]
+
+
+def fingerprint_targets(requested: list[tuple[str, str]]) -> list[str | None]:
+    """Change fingerprints for (target, automation_mode) pairs.
+
+    Mock scans have nothing to observe, so their fingerprint only covers the
+    scan configuration and stays the same until it expires.
+    """
+    if _engine is not None:
+        return _engine.fingerprint_many(requested)
+    return [
+        fingerprints.digest(SCAN_ENGINE, target, mode)
+        for target, mode in requested
+    ]
+
+
+def rescan(
+    requested: list[tuple[str, str]], region: str | None = None
+) -> tuple[list[int], int]:
+    """Scan only the targets whose fingerprint changed since their last scan.
+
+    Unchanged targets, within FINGERPRINT_MAX_AGE of their last full scan,
+    carry that scan forward. Returns scan ids in input order and how many
+    targets were skipped. Fingerprints live in ``region``'s shard, next to
+    the scans they point at.
+    """
+    pool = get_shards().pool(region)
+    observed = fingerprint_targets(requested)
+    since = utc_timestamp(
+        datetime.now(timezone.utc) - timedelta(seconds=FINGERPRINT_MAX_AGE)
+    )
+    with pool.connection() as conn:
+        scan_ids = fingerprints.unchanged(
+            conn, requested, observed, since=since
+        )
+    skipped = len(scan_ids)
+    changed = [
+        position
+        for position in range(len(requested))
+        if position not in scan_ids
+    ]
+    if changed:
+        pending = [requested[position] for position in changed]
+        new_ids = insert_scans(
+            findings_rows(pending, scan_targets(pending)), region
+        )
+        scan_ids.update(zip(changed, new_ids))
+        checked_at = utc_timestamp()
+        with pool.connection() as conn:
+            fingerprints.record(
+                conn,
+                (
+                    (
+                        *requested[position],
+                        observed[position],
+                        scan_ids[position],
+                        checked_at,
+                    )
+                    for position in changed
+                    if observed[position] is not None
+                ),
+            )
+            conn.commit()
+    return [scan_ids[position] for position in range(len(requested))], skipped
 
 
 def simulate_scan(target: str, automation_mode: str) -> dict:
-    """Return mock findings to mimic an automation-assisted scan."""
-    statuses = ["passed", "warning", "failed"]
-    status = random.choices(statuses, weights=[0.6, 0.3, 0.1], k=1)[0]
+    """Return findings for one target.
+
+    With AUTOSCAN_ENGINE=network the target is really checked (TCP, HTTP,
+    TLS expiry); otherwise mock findings mimic an automation-assisted scan.
+    """
+    if _engine is not None:
+        return _engine.scan(target, automation_mode)
+    status = random.choices(SCAN_STATUSES, weights=[0.6, 0.3, 0.1], k=1)[0]
     snippets = {
         "passed": f"{target} cleared {automation_mode} checks.",
         "warning": f"{target} has drift indicators; schedule manual follow-up.",
@@ -132,5 +1184,9 @@ app = create_app()
 
 
 if __name__ == "__main__":
+    # debug=True runs the reloader: this process only watches files and a
+    # child re-runs the module to serve. Warm up (and so start the job and
+    # retention workers) in the serving process only.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
     app.run(host="0.0.0.0", port=5001, debug=True)
-
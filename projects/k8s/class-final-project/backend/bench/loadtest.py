@@ -0,0 +1,267 @@
+"""Load and regression benchmark for the AutoScan API.
+
+Starts the app from create_app() against a throwaway database seeded with a
+fixed number of rows, drives a weighted GET/POST mix from concurrent client
+threads over real HTTP, and reports throughput plus p50/p95/p99 latency.
+
+    python bench/loadtest.py --rows 100k --concurrency 16 --duration 15
+    python bench/loadtest.py --rows 1k --save bench/baseline.json
+    python bench/loadtest.py --rows 1k --compare bench/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ROW_PRESETS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SEED = 1337
+TARGETS = [f"host-{index:04d}.cluster.local" for index in range(500)]
+MODES = ("automated", "augmented", "manual")
+
+# name -> (weight, method, path factory)
+WORKLOAD = {
+    "list": (50, "GET", lambda rnd: "/api/scans"),
+    "filter": (
+        15,
+        "GET",
+        lambda rnd: "/api/scans?status=failed&target=" + rnd.choice(TARGETS),
+    ),
+    "stats": (10, "GET", lambda rnd: "/api/scans/stats?dimension=hour"),
+    "health": (5, "GET", lambda rnd: "/api/health"),
+    "submit": (20, "POST", lambda rnd: "/api/scans"),
+}
+
+
+def parse_rows(value: str) -> int:
+    return ROW_PRESETS.get(value.lower()) or int(value)
+
+
+def seed_database(db_path: Path, rows: int) -> None:
+    """Bulk-load ``rows`` deterministic scan_runs over the last 30 days."""
+    import seed
+    from db import ConnectionPool
+
+    pool = ConnectionPool(db_path, size=1)
+    seed.bulk_load(pool, rows, targets=TARGETS, days=30, seed=SEED)
+    pool.close()
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def run_load(port: int, concurrency: int, duration: float) -> dict:
+    names = list(WORKLOAD)
+    weights = [WORKLOAD[name][0] for name in names]
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(worker: int) -> None:
+        rnd = random.Random(SEED + worker)
+        local: dict[str, list[float]] = defaultdict(list)
+        local_errors: dict[str, int] = defaultdict(int)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while time.perf_counter() < deadline:
+            name = rnd.choices(names, weights=weights, k=1)[0]
+            _, method, path = WORKLOAD[name]
+            body = None
+            if method == "POST":
+                body = json.dumps(
+                    {
+                        "target": rnd.choice(TARGETS),
+                        "automationMode": rnd.choice(MODES),
+                    }
+                )
+            started = time.perf_counter()
+            try:
+                conn.request(
+                    method,
+                    path(rnd),
+                    body=body,
+                    headers={"Content-Type": "application/json"},
+                )
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    local_errors[name] += 1
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                local_errors[name] += 1
+                conn.close()
+            local[name].append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            for key, values in local.items():
+                latencies[key].extend(values)
+            for key, count in local_errors.items():
+                errors[key] += count
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=client, args=(worker,))
+        for worker in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "overall": summarize(
+            [value for values in latencies.values() for value in values],
+            elapsed,
+            sum(errors.values()),
+        )
+    }
+    for name in names:
+        report[name] = summarize(latencies[name], elapsed, errors[name])
+    return report
+
+
+def run_scenario(rows: int, concurrency: int, duration: float) -> dict:
+    from werkzeug.serving import make_server
+
+    with tempfile.TemporaryDirectory(prefix="autoscan-bench-") as tmp:
+        db_path = Path(tmp) / "autoscan.db"
+        # app.py builds a module-level app at import; keep it off the real DB.
+        os.environ["AUTOSCAN_DB_PATH"] = str(db_path)
+        sys.path.insert(0, str(BACKEND_DIR))
+        import app as autoscan
+
+        # Create the schema and start the workers before seeding, so neither
+        # the seed nor the first measured requests pay for it.
+        flask_app = autoscan.create_app(db_path)
+        autoscan.warm_up()
+        seeded = time.perf_counter()
+        seed_database(db_path, rows)
+        seed_seconds = time.perf_counter() - seeded
+        autoscan.scan_cache.bump()
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            report = run_load(server.server_port, concurrency, duration)
+        finally:
+            server.shutdown()
+            autoscan._jobs.stop()
+            autoscan.get_shards().close()
+
+    report["seed_seconds"] = round(seed_seconds, 2)
+    return report
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return human-readable regressions beyond ``tolerance`` (a fraction)."""
+    regressions = []
+    for name, expected in baseline.items():
+        actual = current.get(name)
+        if not isinstance(expected, dict) or not isinstance(actual, dict):
+            continue
+        floor = expected["throughput_rps"] * (1 - tolerance)
+        if actual["throughput_rps"] < floor:
+            regressions.append(
+                f"{name}: throughput {actual['throughput_rps']} rps < "
+                f"{expected['throughput_rps']} rps baseline"
+            )
+        ceiling = expected["p95_ms"] * (1 + tolerance)
+        if actual["p95_ms"] > ceiling:
+            regressions.append(
+                f"{name}: p95 {actual['p95_ms']} ms > "
+                f"{expected['p95_ms']} ms baseline"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows",
+        type=parse_rows,
+        default=ROW_PRESETS["1k"],
+        help="seeded rows: 1k, 100k, 1m or a number",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--save", type=Path, help="write results as baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to check")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="allowed regression as a fraction (default 0.15)",
+    )
+    args = parser.parse_args()
+
+    scenario = f"rows={args.rows},concurrency={args.concurrency}"
+    report = run_scenario(args.rows, args.concurrency, args.duration)
+
+    print(f"scenario {scenario} (seeded in {report['seed_seconds']}s)")
+    print(
+        f"{'operation':<10}{'requests':>10}{'errors':>8}{'rps':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for name, result in report.items():
+        if not isinstance(result, dict):
+            continue
+        print(
+            f"{name:<10}{result['requests']:>10}{result['errors']:>8}"
+            f"{result['throughput_rps']:>10}{result['p50_ms']:>10}"
+            f"{result['p95_ms']:>10}{result['p99_ms']:>10}"
+        )
+
+    if args.save:
+        saved = json.loads(args.save.read_text()) if args.save.exists() else {}
+        saved[scenario] = report
+        args.save.write_text(
+            json.dumps(saved, indent=2, sort_keys=True) + "\n"
+        )
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text()).get(scenario)
+        if baseline is None:
+            print(f"no baseline recorded for {scenario}")
+            return 1
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
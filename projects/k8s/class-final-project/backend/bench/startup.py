@@ -0,0 +1,125 @@
+"""Startup timing report for the AutoScan backend.
+
+Starts fresh interpreters the way a new pod does, imports app.py under
+``python -X importtime``, and times the first requests against a throwaway
+database: once with no database file (first deploy) and once reusing it (a
+restart or scale-out onto an existing volume).
+
+    python bench/startup.py
+    python bench/startup.py --top 20 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in the child interpreter; prints its timings as one JSON line.
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+timings = {"import_ms": (time.perf_counter() - started) * 1000}
+client = app.app.test_client()
+for name, path in (("health", "/api/health"), ("scans", "/api/scans")):
+    began = time.perf_counter()
+    status = client.get(path).status_code
+    assert status == 200, (path, status)
+    timings[f"first_{name}_ms"] = (time.perf_counter() - began) * 1000
+timings["ready_ms"] = (time.perf_counter() - started) * 1000
+print(json.dumps(timings))
+"""
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Rows of ``-X importtime`` output as name/self/cumulative/depth dicts."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append(
+            {
+                "name": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return rows
+
+
+def measure(db_path: Path) -> dict:
+    env = {**os.environ, "AUTOSCAN_DB_PATH": str(db_path)}
+    began = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    wall_ms = (time.perf_counter() - began) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"startup probe failed:\n{result.stderr[-2000:]}")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(result.stderr)
+    # Modules imported directly by app.py (and by site at interpreter start).
+    top_level = [row for row in imports if row["depth"] <= 1]
+    return {
+        **{key: round(value, 1) for key, value in timings.items()},
+        "process_ms": round(wall_ms, 1),
+        "imports": sorted(
+            top_level, key=lambda row: row["cumulative_ms"], reverse=True
+        ),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--top", type=int, default=10, help="slowest imports to list"
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="print the report as JSON"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="autoscan-startup-") as tmp:
+        db_path = Path(tmp) / "autoscan.db"
+        report = {"cold": measure(db_path), "restart": measure(db_path)}
+    for run in report.values():
+        run["imports"] = run["imports"][: args.top]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(
+        f"{'run':<10}{'import ms':>11}{'health ms':>11}{'scans ms':>10}"
+        f"{'ready ms':>10}{'process ms':>12}"
+    )
+    for name, run in report.items():
+        print(
+            f"{name:<10}{run['import_ms']:>11}{run['first_health_ms']:>11}"
+            f"{run['first_scans_ms']:>10}{run['ready_ms']:>10}"
+            f"{run['process_ms']:>12}"
+        )
+    print(f"\nslowest imports on restart (cumulative, top {args.top}):")
+    for row in report["restart"]["imports"]:
+        print(f"  {row['name']:<30}{row['cumulative_ms']:>10.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple
+
+
+class CachedResponse(NamedTuple):
+    generation: int
+    body: bytes
+    etag: str
+
+
+class ResponseCache:
+    """LRU of serialized responses, invalidated wholesale by a generation bump.
+
+    Writers call bump() after committing; entries stamped with an older
+    generation are treated as misses, so nothing has to be purged eagerly.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self.generation = 0
+
+    def bump(self) -> None:
+        # next() on itertools.count is atomic under the GIL.
+        self.generation = next(self._counter)
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generation != self.generation:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, generation: int, body: bytes) -> CachedResponse:
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = CachedResponse(generation, body, etag)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+class TTLCache:
+    """LRU of arbitrary values that expire ``ttl`` seconds after being stored.
+
+    Expired entries are dropped when next read; the LRU bound keeps memory
+    fixed regardless of how many never get read again.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
@@ -0,0 +1,466 @@
+"""Network scan engine: TCP reachability, HTTP status and TLS expiry.
+
+Checks run on one asyncio loop in a background thread, so every caller (job
+workers, batch requests) shares a single global concurrency limit and the
+per-host rate limits. Point it at local stand-in servers to try it out:
+
+    python -m http.server 8080 &
+    python engine.py localhost:8080 https://localhost:8443 --ca-file cert.pem
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import ssl
+import threading
+import time
+from typing import Iterable, NamedTuple
+from urllib.parse import urlsplit
+
+DEFAULT_PORTS = (80, 443)
+CONCURRENCY = 200
+HOST_RATE = 5.0
+CONNECT_TIMEOUT = 3.0
+TARGET_TIMEOUT = 10.0
+TLS_WARN_DAYS = 14
+SEVERITIES = ("passed", "warning", "failed")
+BANNER_TIMEOUT = 0.2
+MAX_HEADERS = 100
+# Response headers that change when the content or server behind it does.
+FINGERPRINT_HEADERS = frozenset(
+    ("etag", "last-modified", "content-length", "server", "location")
+)
+# Scheme assumed for a port when the target does not name one.
+_PORT_SCHEMES = {80: "http", 443: "https"}
+# Hosts tracked by the rate limiter before stale entries are pruned.
+_MAX_TRACKED_HOSTS = 10_000
+
+
+class Check(NamedTuple):
+    port: int
+    scheme: str
+    reachable: bool
+    severity: str
+    detail: str
+
+
+def parse_target(
+    target: str, ports: Iterable[int] = DEFAULT_PORTS
+) -> tuple[str, list[tuple[int, str]], str]:
+    """Split a target into (host, [(port, scheme)], HTTP path).
+
+    ``https://host:8443/health`` checks exactly that URL, ``host:22`` one
+    port, and a bare ``host`` every port in ``ports``.
+    """
+    if "://" in target:
+        parts = urlsplit(target)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"unsupported scheme {scheme!r}")
+        if not parts.hostname:
+            raise ValueError("no host given")
+        port = parts.port or (443 if scheme == "https" else 80)
+        return parts.hostname, [(port, scheme)], parts.path or "/"
+    host, _, port = target.rpartition(":")
+    if host and port.isdigit():
+        return host, [(int(port), _PORT_SCHEMES.get(int(port), "tcp"))], "/"
+    return (
+        target,
+        [(port, _PORT_SCHEMES.get(port, "tcp")) for port in ports],
+        "/",
+    )
+
+
+def summarize(target: str, automation_mode: str, checks: list[Check]) -> dict:
+    """Fold port checks into the {"status", "summary"} findings shape.
+
+    A closed port only matters when nothing on the target answered.
+    """
+    reachable = [check for check in checks if check.reachable]
+    if not reachable:
+        ports = ", ".join(f"{check.port}/{check.scheme}" for check in checks)
+        return {
+            "status": "failed",
+            "summary": f"{target} is unreachable on {ports}.",
+        }
+    status = max((check.severity for check in reachable), key=SEVERITIES.index)
+    details = "; ".join(
+        f"{check.port}/{check.scheme} {check.detail}" for check in checks
+    )
+    return {
+        "status": status,
+        "summary": f"{target} {automation_mode} checks: {details}.",
+    }
+
+
+class HostRateLimiter:
+    """Spaces connection attempts to one host at least 1/rate seconds apart.
+
+    Thread-safe and loop-agnostic: the reservation is taken under a lock and
+    the wait happens with asyncio.sleep.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if len(self._next) > _MAX_TRACKED_HOSTS:
+                self._next = {
+                    key: due for key, due in self._next.items() if due > now
+                }
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class NetworkEngine:
+    """Runs real checks against targets, many at a time.
+
+    ``concurrency`` caps connections in flight across all callers,
+    ``host_rate`` caps new connections per second to any one host, and each
+    check gets ``target_timeout`` seconds. That clock starts once the check
+    holds its rate-limit and concurrency slots, so time spent queued behind
+    a large batch never counts against a target.
+    """
+
+    def __init__(
+        self,
+        *,
+        ports: Iterable[int] = DEFAULT_PORTS,
+        concurrency: int = CONCURRENCY,
+        host_rate: float = HOST_RATE,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        target_timeout: float = TARGET_TIMEOUT,
+        tls_warn_days: int = TLS_WARN_DAYS,
+        ca_file: str | None = None,
+    ) -> None:
+        self.ports = tuple(ports)
+        self.concurrency = concurrency
+        self.connect_timeout = connect_timeout
+        self.target_timeout = target_timeout
+        self.tls_warn_days = tls_warn_days
+        self._tls = ssl.create_default_context(cafile=ca_file)
+        self._limiter = HostRateLimiter(host_rate)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="scan-engine", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+
+    def scan(self, target: str, automation_mode: str) -> dict:
+        return self.scan_many([(target, automation_mode)])[0]
+
+    def scan_many(self, requested: Iterable[tuple[str, str]]) -> list[dict]:
+        """Scan (target, automation_mode) pairs concurrently, in input order.
+
+        Blocks the calling thread until every target has been checked.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._scan_all(list(requested)), self._loop
+        ).result()
+
+    async def _scan_all(self, requested: list[tuple[str, str]]) -> list[dict]:
+        return await asyncio.gather(
+            *(self.scan_target(target, mode) for target, mode in requested)
+        )
+
+    async def scan_target(self, target: str, automation_mode: str) -> dict:
+        try:
+            host, services, path = parse_target(target, self.ports)
+        except ValueError as exc:
+            return {
+                "status": "failed",
+                "summary": f"{target} is not a scannable target: {exc}.",
+            }
+        try:
+            checks = await asyncio.gather(
+                *(
+                    self._check(host, port, scheme, path)
+                    for port, scheme in services
+                )
+            )
+        except asyncio.TimeoutError:
+            return {
+                "status": "failed",
+                "summary": f"{target} did not finish checks within "
+                f"{self.target_timeout:g}s.",
+            }
+        return summarize(target, automation_mode, checks)
+
+    async def _check(
+        self, host: str, port: int, scheme: str, path: str
+    ) -> Check:
+        """Run one check, raising TimeoutError past ``target_timeout``."""
+        await self._limiter.wait(host)
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                self._run_check(host, port, scheme, path), self.target_timeout
+            )
+
+    async def _run_check(
+        self, host: str, port: int, scheme: str, path: str
+    ) -> Check:
+        try:
+            reader, writer = await self._connect(host, port, scheme)
+        except ssl.SSLCertVerificationError as exc:
+            return Check(
+                port,
+                scheme,
+                True,
+                "failed",
+                f"TLS certificate rejected ({exc.verify_message})",
+            )
+        except (OSError, asyncio.TimeoutError):
+            return Check(port, scheme, False, "failed", "closed")
+        try:
+            return await self._inspect(
+                reader, writer, host, port, scheme, path
+            )
+        except (OSError, asyncio.TimeoutError, ValueError):
+            return Check(
+                port, scheme, True, "warning", "open, no HTTP response"
+            )
+        finally:
+            writer.close()
+
+    async def _connect(
+        self, host: str, port: int, scheme: str
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        tls = scheme == "https"
+        return await asyncio.wait_for(
+            asyncio.open_connection(
+                host,
+                port,
+                ssl=self._tls if tls else None,
+                server_hostname=host if tls else None,
+            ),
+            self.connect_timeout,
+        )
+
+    async def _inspect(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        host: str,
+        port: int,
+        scheme: str,
+        path: str,
+    ) -> Check:
+        if scheme == "tcp":
+            return Check(port, scheme, True, "passed", "open")
+
+        severity = "passed"
+        details = []
+        if scheme == "https":
+            not_after = writer.get_extra_info("peercert")["notAfter"]
+            days = int(
+                (ssl.cert_time_to_seconds(not_after) - time.time()) // 86_400
+            )
+            if days < self.tls_warn_days:
+                severity = "warning"
+            details.append(f"TLS expires in {days} days")
+
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+            "User-Agent: autoscan\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(
+            reader.readline(), self.connect_timeout
+        )
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ValueError("not an HTTP response")
+        code = int(parts[1])
+        if code >= 500:
+            severity = "failed"
+        elif code >= 400 and severity == "passed":
+            severity = "warning"
+        details.insert(0, f"HTTP {code}")
+        return Check(port, scheme, True, severity, ", ".join(details))
+
+    def fingerprint_many(
+        self, requested: Iterable[tuple[str, str]]
+    ) -> list[str | None]:
+        """Cheap change fingerprints for (target, automation_mode) pairs.
+
+        A fingerprint digests what a target exposes (HTTP status and
+        validators from a HEAD request, the certificate and whether it is
+        inside the warning window, a TCP banner) without running the checks.
+        None means the probe could not tell, so the target must be scanned.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._fingerprint_all(list(requested)), self._loop
+        ).result()
+
+    async def _fingerprint_all(
+        self, requested: list[tuple[str, str]]
+    ) -> list[str | None]:
+        return await asyncio.gather(
+            *(self.fingerprint_target(target) for target, _ in requested)
+        )
+
+    async def fingerprint_target(self, target: str) -> str | None:
+        try:
+            host, services, path = parse_target(target, self.ports)
+            observed = await asyncio.gather(
+                *(
+                    self._probe(host, port, scheme, path)
+                    for port, scheme in services
+                )
+            )
+        except (ValueError, asyncio.TimeoutError):
+            return None
+        if None in observed:
+            return None
+        digest = hashlib.sha256(f"warn={self.tls_warn_days}".encode())
+        for part in observed:
+            digest.update(b"\x1f" + part.encode())
+        return digest.hexdigest()
+
+    async def _probe(
+        self, host: str, port: int, scheme: str, path: str
+    ) -> str | None:
+        await self._limiter.wait(host)
+        async with self._semaphore:
+            return await asyncio.wait_for(
+                self._run_probe(host, port, scheme, path), self.target_timeout
+            )
+
+    async def _run_probe(
+        self, host: str, port: int, scheme: str, path: str
+    ) -> str | None:
+        try:
+            reader, writer = await self._connect(host, port, scheme)
+        except ssl.SSLCertVerificationError as exc:
+            return f"{port} rejected {exc.verify_message}"
+        except (OSError, asyncio.TimeoutError):
+            return f"{port} closed"
+        try:
+            return await self._observe(
+                reader, writer, host, port, scheme, path
+            )
+        except (OSError, asyncio.TimeoutError, ValueError):
+            return None
+        finally:
+            writer.close()
+
+    async def _observe(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        host: str,
+        port: int,
+        scheme: str,
+        path: str,
+    ) -> str:
+        if scheme == "tcp":
+            # Services such as SSH or SMTP greet first; most stay silent.
+            try:
+                banner = await asyncio.wait_for(
+                    reader.read(256), BANNER_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                banner = b""
+            return f"{port} tcp {hashlib.sha256(banner).hexdigest()}"
+
+        parts = [f"{port} {scheme}"]
+        if scheme == "https":
+            ssl_object = writer.get_extra_info("ssl_object")
+            der = ssl_object.getpeercert(binary_form=True)
+            not_after = ssl_object.getpeercert()["notAfter"]
+            expiring = (
+                ssl.cert_time_to_seconds(not_after) - time.time()
+                < self.tls_warn_days * 86_400
+            )
+            parts.append(f"{hashlib.sha256(der).hexdigest()} {expiring}")
+
+        writer.write(
+            f"HEAD {path} HTTP/1.1\r\nHost: {host}\r\n"
+            "User-Agent: autoscan\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(
+            reader.readline(), self.connect_timeout
+        )
+        if not status_line.startswith(b"HTTP/"):
+            raise ValueError("not an HTTP response")
+        parts.append(status_line.split(maxsplit=2)[1].decode())
+        for _ in range(MAX_HEADERS):
+            line = await asyncio.wait_for(
+                reader.readline(), self.connect_timeout
+            )
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() in FINGERPRINT_HEADERS:
+                parts.append(f"{name.strip().lower()}={value.strip()}")
+        return " ".join(parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run network scan checks against targets."
+    )
+    parser.add_argument("targets", nargs="+")
+    parser.add_argument("--mode", default="automated")
+    parser.add_argument(
+        "--ports",
+        default=",".join(map(str, DEFAULT_PORTS)),
+        help="ports checked on bare hosts (default 80,443)",
+    )
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--host-rate", type=float, default=HOST_RATE)
+    parser.add_argument("--timeout", type=float, default=TARGET_TIMEOUT)
+    parser.add_argument(
+        "--ca-file", help="CA bundle to trust instead of the system store"
+    )
+    args = parser.parse_args()
+
+    engine = NetworkEngine(
+        ports=[int(port) for port in args.ports.split(",")],
+        concurrency=args.concurrency,
+        host_rate=args.host_rate,
+        target_timeout=args.timeout,
+        ca_file=args.ca_file,
+    )
+    engine.start()
+    started = time.perf_counter()
+    results = engine.scan_many((target, args.mode) for target in args.targets)
+    engine.stop()
+    for target, findings in zip(args.targets, results):
+        print(json.dumps({"target": target, **findings}))
+    print(
+        f"scanned {len(results)} targets "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
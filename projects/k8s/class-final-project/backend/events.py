@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+from typing import Callable, Iterable, Iterator
+
+MAX_PENDING = 256
+HEARTBEAT_SECONDS = 15.0
+KEEPALIVE = b": keepalive\n\n"
+
+
+class TooManySubscribers(Exception):
+    """Raised when subscribing while the broadcaster is at its limit."""
+
+
+class Subscription:
+    __slots__ = ("queue", "evicted")
+
+    def __init__(self, max_pending: int) -> None:
+        # (last scan id in the chunk, encoded SSE frames)
+        self.queue: queue.Queue[tuple[int, bytes]] = queue.Queue(max_pending)
+        self.evicted = False
+
+
+def encode(rows: Iterable[dict]) -> tuple[int, bytes]:
+    """Render scan rows as SSE ``scan`` events; returns (last id, frames)."""
+    last_id = 0
+    frames = []
+    for row in rows:
+        last_id = row["id"]
+        data = json.dumps(row, separators=(",", ":"))
+        frames.append(f"id: {last_id}\nevent: scan\ndata: {data}\n\n")
+    return last_id, "".join(frames).encode()
+
+
+class Broadcaster:
+    """Fans committed scans out to SSE subscribers from one publish call.
+
+    Each publish encodes its rows once and hands the same bytes to every
+    subscriber's bounded queue, so a write costs one enqueue per subscriber
+    and no database reads. A subscriber whose queue fills up (a client that
+    stopped reading) is evicted: it gets what was already buffered and then
+    its stream ends, and the browser reconnects with Last-Event-ID.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_pending: int = MAX_PENDING,
+        max_subscribers: int = 100,
+        on_evict: Callable[[], None] | None = None,
+    ) -> None:
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self.on_evict = on_evict
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers(
+                    f"scan stream is full ({self.max_subscribers} clients)"
+                )
+            subscription = Subscription(self.max_pending)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, rows: Iterable[dict]) -> None:
+        if not self._subscribers:
+            return
+        chunk = encode(rows)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(chunk)
+            except queue.Full:
+                subscription.evicted = True
+                self.unsubscribe(subscription)
+                if self.on_evict is not None:
+                    self.on_evict()
+
+    def stream(
+        self,
+        subscription: Subscription,
+        backlog: Iterable[dict] = (),
+        *,
+        heartbeat: float = HEARTBEAT_SECONDS,
+    ) -> Iterator[bytes]:
+        """Yield ``backlog`` and then live events until evicted or closed.
+
+        Subscribe before reading the backlog so nothing committed in between
+        is missed; chunks the backlog already covered are skipped. A chunk
+        commits atomically, so its last id tells whether it was covered.
+        """
+        try:
+            backlog = list(backlog)
+            seen = {row["id"] for row in backlog}
+            _, frames = encode(backlog)
+            yield b"retry: 2000\n\n" + frames
+            while True:
+                if subscription.evicted and subscription.queue.empty():
+                    return
+                try:
+                    last_id, frames = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield KEEPALIVE
+                    continue
+                if last_id not in seen:
+                    yield frames
+        finally:
+            self.unsubscribe(subscription)
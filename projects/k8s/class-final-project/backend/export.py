@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from db import ConnectionPool
+
+COLUMNS = (
+    "id",
+    "target",
+    "automation_mode",
+    "status",
+    "summary",
+    "created_at",
+)
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CHUNK_SIZE = 1000
+
+
+def iter_scan_chunks(
+    pool: ConnectionPool, *, chunk_size: int = CHUNK_SIZE
+) -> Iterator[list[tuple]]:
+    """Yield scan_runs in id order, ``chunk_size`` rows at a time.
+
+    Each chunk is its own short read that resumes after the last id seen, so
+    a slow client never pins a connection or a WAL snapshot for the whole
+    export and memory stays bounded by one chunk.
+    """
+    last_id = 0
+    while True:
+        with pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM scan_runs "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+        if not rows:
+            return
+        yield [tuple(row) for row in rows]
+        last_id = rows[-1][0]
+
+
+def ndjson_chunks(chunks: Iterable[list[tuple]]) -> Iterator[str]:
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(COLUMNS, row)), separators=(",", ":")) + "\n"
+            for row in rows
+        )
+
+
+def csv_chunks(chunks: Iterable[list[tuple]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def render(fmt: str, chunks: Iterable[list[tuple]]) -> Iterator[str]:
+    return ndjson_chunks(chunks) if fmt == "ndjson" else csv_chunks(chunks)
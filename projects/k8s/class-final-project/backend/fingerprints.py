@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable
+
+# Targets looked up per query; keeps the IN list under SQLite's limits.
+LOOKUP_CHUNK = 500
+
+
+def digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def init_schema(conn) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS target_fingerprints (
+            target TEXT NOT NULL,
+            automation_mode TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            scan_id INTEGER NOT NULL,
+            checked_at TEXT NOT NULL,
+            PRIMARY KEY (target, automation_mode)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def unchanged(
+    conn,
+    requested: list[tuple[str, str]],
+    observed: list[str | None],
+    *,
+    since: str,
+) -> dict[int, int]:
+    """Positions in ``requested`` that can reuse their last scan.
+
+    A position qualifies when its ``observed`` fingerprint equals the one
+    recorded by a full scan at or after ``since``. Returns position -> id of
+    that scan.
+    """
+    targets = sorted({target for target, _ in requested})
+    recorded: dict[tuple[str, str], tuple[str, int]] = {}
+    for start in range(0, len(targets), LOOKUP_CHUNK):
+        chunk = targets[start : start + LOOKUP_CHUNK]
+        rows = conn.execute(
+            "SELECT target, automation_mode, fingerprint, scan_id "
+            "FROM target_fingerprints WHERE checked_at >= ? AND target IN "
+            f"({', '.join('?' * len(chunk))})",
+            (since, *chunk),
+        ).fetchall()
+        for target, automation_mode, fingerprint, scan_id in rows:
+            recorded[(target, automation_mode)] = (fingerprint, scan_id)
+
+    carried = {}
+    for position, (key, fingerprint) in enumerate(zip(requested, observed)):
+        previous = recorded.get(key)
+        if fingerprint is not None and previous and previous[0] == fingerprint:
+            carried[position] = previous[1]
+    return carried
+
+
+def record(
+    conn, entries: Iterable[tuple[str, str, str, int, str]]
+) -> None:
+    """Store (target, automation_mode, fingerprint, scan_id, checked_at)."""
+    conn.executemany(
+        """
+        INSERT INTO target_fingerprints
+            (target, automation_mode, fingerprint, scan_id, checked_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (target, automation_mode) DO UPDATE SET
+            fingerprint = excluded.fingerprint,
+            scan_id = excluded.scan_id,
+            checked_at = excluded.checked_at
+        """,
+        entries,
+    )
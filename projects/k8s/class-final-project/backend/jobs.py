@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from db import ConnectionPool, utc_timestamp
+
+# Runs one scan of (target, automation_mode, region) and returns the id of the
+# scan_runs row it recorded.
+ScanRunner = Callable[[str, str, str | None], int]
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+def init_schema(conn) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scan_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target TEXT NOT NULL,
+            automation_mode TEXT NOT NULL,
+            state TEXT NOT NULL,
+            scan_id INTEGER REFERENCES scan_runs (id),
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_jobs)")}
+    if "region" not in columns:
+        conn.execute("ALTER TABLE scan_jobs ADD COLUMN region TEXT")
+    # Which JobQueue runs the job, and until when its claim holds.
+    if "worker" not in columns:
+        conn.execute("ALTER TABLE scan_jobs ADD COLUMN worker TEXT")
+    if "lease_until" not in columns:
+        conn.execute("ALTER TABLE scan_jobs ADD COLUMN lease_until TEXT")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_scan_jobs_state ON scan_jobs (state, id)"
+    )
+
+
+class JobQueue:
+    """Bounded in-process queue of scan jobs, persisted in the scan_jobs table.
+
+    A worker claims a job by marking it running under this queue's id with a
+    lease of ``lease`` seconds, which a heartbeat renews while the job runs.
+    Jobs still queued, and running jobs whose lease ran out because their
+    process stopped, are picked up by start() and then on every heartbeat.
+    Several processes can share the table: a live process's jobs are never
+    taken over. A job may still run twice if its process stalls for longer
+    than the lease, but it is never lost.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        runner: ScanRunner,
+        *,
+        workers: int = 4,
+        depth: int = 1000,
+        lease: float = 60,
+    ) -> None:
+        self.pool = pool
+        self.runner = runner
+        self.workers = workers
+        self.depth = depth
+        self.lease = lease
+        self.worker_id = uuid.uuid4().hex
+        self._queue: queue.Queue[int | None] = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._running: set[int] = set()
+        self._running_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        with self.pool.connection() as conn:
+            pending = conn.execute(
+                "SELECT id FROM scan_jobs WHERE state = 'queued' ORDER BY id"
+            ).fetchall()
+        for row in pending:
+            self._queue.put(row["id"])
+        self._recover_expired()
+
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"scan-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(
+            target=self._heartbeat, name="scan-heartbeat", daemon=True
+        )
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def submit(
+        self, target: str, automation_mode: str, region: str | None = None
+    ) -> int:
+        # Recovered jobs may already exceed the depth; only new work is refused.
+        if self._queue.qsize() >= self.depth:
+            raise QueueFull(f"scan queue is full ({self.depth} jobs)")
+
+        now = utc_timestamp()
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO scan_jobs
+                    (target, automation_mode, region, state, created_at, updated_at)
+                VALUES (?, ?, ?, 'queued', ?, ?)
+                """,
+                (target, automation_mode, region, now, now),
+            )
+            conn.commit()
+        self._queue.put(cursor.lastrowid)
+        return cursor.lastrowid
+
+    def get(self, job_id: int) -> dict | None:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT id, target, automation_mode, region, state, scan_id, "
+                "error, created_at, updated_at FROM scan_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _lease_until(self) -> str:
+        return utc_timestamp(
+            datetime.now(timezone.utc) + timedelta(seconds=self.lease)
+        )
+
+    def _claim(self, job_id: int) -> bool:
+        """Move a queued job to running; False if another worker got it."""
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE scan_jobs SET state = 'running', worker = ?, "
+                "lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND state = 'queued'",
+                (self.worker_id, self._lease_until(), utc_timestamp(), job_id),
+            )
+            conn.commit()
+        return cursor.rowcount == 1
+
+    def _recover_expired(self) -> None:
+        """Queue again the running jobs whose process stopped renewing them.
+
+        Rows from before leases existed have none and count as expired.
+        """
+        now = utc_timestamp()
+        with self.pool.connection() as conn:
+            expired = conn.execute(
+                "SELECT id FROM scan_jobs WHERE state = 'running' "
+                "AND (lease_until IS NULL OR lease_until < ?) ORDER BY id",
+                (now,),
+            ).fetchall()
+            recovered = []
+            for row in expired:
+                cursor = conn.execute(
+                    "UPDATE scan_jobs SET state = 'queued', worker = NULL, "
+                    "lease_until = NULL, updated_at = ? WHERE id = ? "
+                    "AND state = 'running' "
+                    "AND (lease_until IS NULL OR lease_until < ?)",
+                    (now, row["id"], now),
+                )
+                if cursor.rowcount == 1:
+                    recovered.append(row["id"])
+            conn.commit()
+        for job_id in recovered:
+            self._queue.put(job_id)
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.lease / 3):
+            try:
+                self._renew()
+                self._recover_expired()
+            except Exception:  # noqa: BLE001 - retried on the next beat
+                log.exception("scan job heartbeat failed")
+
+    def _renew(self) -> None:
+        with self._running_lock:
+            running = list(self._running)
+        if not running:
+            return
+        lease_until = self._lease_until()
+        with self.pool.connection() as conn:
+            conn.executemany(
+                "UPDATE scan_jobs SET lease_until = ? "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                ((lease_until, job_id, self.worker_id) for job_id in running),
+            )
+            conn.commit()
+
+    def _finish(self, job_id: int, state: str, **fields) -> None:
+        """Record the outcome, unless the lease was lost to another queue."""
+        assignments = "".join(f", {column} = ?" for column in fields)
+        with self.pool.connection() as conn:
+            conn.execute(
+                f"UPDATE scan_jobs SET state = ?, lease_until = NULL, "
+                f"updated_at = ?{assignments} WHERE id = ? AND worker = ?",
+                (
+                    state,
+                    utc_timestamp(),
+                    *fields.values(),
+                    job_id,
+                    self.worker_id,
+                ),
+            )
+            conn.commit()
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            # Processes sharing the database may both hold this id.
+            if not self._claim(job_id):
+                continue
+
+            job = self.get(job_id)
+            with self._running_lock:
+                self._running.add(job_id)
+            try:
+                scan_id = self.runner(
+                    job["target"], job["automation_mode"], job["region"]
+                )
+            except Exception as exc:  # noqa: BLE001 - recorded on the job row
+                self._finish(job_id, "failed", error=str(exc))
+            else:
+                self._finish(job_id, "done", scan_id=scan_id)
+            finally:
+                with self._running_lock:
+                    self._running.discard(job_id)
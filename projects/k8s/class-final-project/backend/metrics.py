@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+import time
+from typing import Callable
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Shard:
+    __slots__ = ("lock", "values", "histograms")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.values: dict[tuple, float] = {}
+        # (name, labels) -> [count per bucket..., +Inf count, sum]
+        self.histograms: dict[tuple, list[float]] = {}
+
+
+class Registry:
+    """Prometheus-style metrics with writes spread over per-thread shards.
+
+    Each thread is pinned to one shard, so recording a sample takes an
+    uncontended lock and a dict update; shards are only summed on scrape.
+    """
+
+    def __init__(
+        self, shards: int = 16, buckets: tuple = LATENCY_BUCKETS
+    ) -> None:
+        self.buckets = buckets
+        self._shards = [_Shard() for _ in range(shards)]
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+        self._meta: dict[str, tuple[str, str, tuple[str, ...]]] = {}
+        self._callbacks: dict[str, Callable[[], float]] = {}
+
+    def counter(
+        self, name: str, help_text: str, labels: tuple[str, ...] = ()
+    ) -> None:
+        self._meta[name] = ("counter", help_text, labels)
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> None:
+        self._meta[name] = ("gauge", help_text, labels)
+        if callback is not None:
+            self._callbacks[name] = callback
+
+    def histogram(
+        self, name: str, help_text: str, labels: tuple[str, ...] = ()
+    ) -> None:
+        self._meta[name] = ("histogram", help_text, labels)
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._shards[next(self._next_shard) % len(self._shards)]
+            self._local.shard = shard
+            return shard
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1) -> None:
+        shard = self._shard()
+        key = (name, labels)
+        with shard.lock:
+            shard.values[key] = shard.values.get(key, 0) + value
+
+    def observe(self, name: str, labels: tuple, value: float) -> None:
+        shard = self._shard()
+        key = (name, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with shard.lock:
+            series = shard.histograms.get(key)
+            if series is None:
+                series = shard.histograms[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, name: str, labels: tuple = ()) -> "_Timer":
+        return _Timer(self, name, labels)
+
+    def render(self) -> str:
+        values: dict[tuple, float] = {}
+        histograms: dict[tuple, list[float]] = {}
+        for shard in self._shards:
+            with shard.lock:
+                for key, value in shard.values.items():
+                    values[key] = values.get(key, 0) + value
+                for key, series in shard.histograms.items():
+                    total = histograms.setdefault(key, [0] * len(series))
+                    for index, value in enumerate(series):
+                        total[index] += value
+        for name, callback in self._callbacks.items():
+            values[(name, ())] = callback()
+
+        lines = []
+        for name, (kind, help_text, label_names) in self._meta.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                for (series_name, labels), value in values.items():
+                    if series_name == name:
+                        lines.append(
+                            f"{name}{_labels(label_names, labels)} {value:g}"
+                        )
+                continue
+            for (series_name, labels), series in histograms.items():
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip((*self.buckets, "+Inf"), series):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(
+                        f"{name}_bucket{_labels(label_names, labels, le)} {cumulative:g}"
+                    )
+                lines.append(
+                    f"{name}_sum{_labels(label_names, labels)} {series[-1]:g}"
+                )
+                lines.append(
+                    f"{name}_count{_labels(label_names, labels)} {cumulative:g}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry: Registry, name: str, labels: tuple) -> None:
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.registry.observe(
+            self.name, self.labels, time.perf_counter() - self.start
+        )
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
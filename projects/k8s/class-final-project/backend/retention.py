@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Callable, Iterator, Sequence
+
+import export
+from db import ConnectionPool, utc_timestamp
+
+BATCH_SIZE = 500
+# Recently archived ids remembered while streaming history; must exceed the
+# largest batch size in use.
+DEDUPE_WINDOW = 20_000
+# Pause between delete batches so queued writers get the lock in between.
+BATCH_PAUSE = 0.01
+
+log = logging.getLogger(__name__)
+
+
+def archive_path(archive_dir: Path, day: str, first_id: int) -> Path:
+    """One file per batch and day, named after the batch's first row."""
+    return archive_dir / f"scan_runs-{day}-{first_id:020d}.ndjson.gz"
+
+
+def write_archive(path: Path, rows: Sequence) -> None:
+    """Write ``rows`` to ``path`` in full or not at all.
+
+    The gzip stream goes to a temporary name, is synced to disk and only
+    then renamed into place: the rows are deleted from SQLite afterwards,
+    so a crash must never leave a truncated archive behind.
+    """
+    partial = path.with_name(path.name + ".tmp")
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as fh:
+            fh.writelines(
+                (json.dumps(dict(row), separators=(",", ":")) + "\n").encode()
+                for row in rows
+            )
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+
+
+def archive_expired(
+    pool: ConnectionPool,
+    archive_dir: Path,
+    *,
+    cutoff: str,
+    batch_size: int = BATCH_SIZE,
+    on_batch: Callable[[], None] | None = None,
+) -> int:
+    """Move scan_runs rows created before ``cutoff`` into gzip archives.
+
+    Each bounded batch is written to its own file per day before its rows
+    are deleted in one transaction. A crash in between leaves the rows in
+    both places; the next pass selects the same batch again and replaces
+    the file of the same name, so rows are never lost or repeated.
+    Returns the number of rows moved.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    columns = ", ".join(export.COLUMNS)
+    moved = 0
+    while True:
+        with pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {columns} FROM scan_runs WHERE created_at < ? "
+                "ORDER BY created_at, id LIMIT ?",
+                (cutoff, batch_size),
+            ).fetchall()
+        if not rows:
+            break
+
+        for day, day_rows in groupby(
+            rows, key=lambda row: row["created_at"][:10]
+        ):
+            day_rows = list(day_rows)
+            write_archive(
+                archive_path(archive_dir, day, day_rows[0]["id"]), day_rows
+            )
+
+        with pool.connection() as conn:
+            conn.executemany(
+                "DELETE FROM scan_runs WHERE id = ?",
+                ((row["id"],) for row in rows),
+            )
+            conn.commit()
+        moved += len(rows)
+        if on_batch is not None:
+            on_batch()
+        time.sleep(BATCH_PAUSE)
+
+    with pool.connection() as conn:
+        conn.execute(
+            "DELETE FROM scan_jobs WHERE state IN ('done', 'failed') "
+            "AND updated_at < ?",
+            (cutoff,),
+        )
+        conn.commit()
+    return moved
+
+
+class _RecentIds:
+    """Membership test over the last ``size`` ids added, in bounded memory."""
+
+    def __init__(self, size: int) -> None:
+        self._order: deque[int] = deque(maxlen=size)
+        self._ids: set[int] = set()
+
+    def __contains__(self, scan_id: int) -> bool:
+        return scan_id in self._ids
+
+    def add(self, scan_id: int) -> None:
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(scan_id)
+        self._ids.add(scan_id)
+
+
+def iter_archived_chunks(
+    archive_dir: Path,
+    *,
+    chunk_size: int = export.CHUNK_SIZE,
+    recent: _RecentIds | None = None,
+) -> Iterator[list[tuple]]:
+    """Yield archived rows oldest day first, each row exactly once.
+
+    Older archives appended every batch to one file per day, where a crash
+    could archive a batch twice in a row; a bounded window of recently seen
+    ids is enough to drop those duplicates.
+    """
+    recent = recent if recent is not None else _RecentIds(DEDUPE_WINDOW)
+    chunk: list[tuple] = []
+    for path in sorted(archive_dir.glob("scan_runs-*.ndjson.gz")):
+        with gzip.open(path, "rt") as fh:
+            for line in fh:
+                record = json.loads(line)
+                if record["id"] in recent:
+                    continue
+                recent.add(record["id"])
+                chunk.append(
+                    tuple(record[column] for column in export.COLUMNS)
+                )
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_history(
+    pools: Sequence[ConnectionPool], archive_dir: Path
+) -> Iterator[list[tuple]]:
+    """Archived rows followed by each hot table, skipping rows found in both."""
+    recent = _RecentIds(DEDUPE_WINDOW)
+    yield from iter_archived_chunks(archive_dir, recent=recent)
+    for pool in pools:
+        for chunk in export.iter_scan_chunks(pool):
+            fresh = [row for row in chunk if row[0] not in recent]
+            if fresh:
+                yield fresh
+
+
+def cutoff_for(days: int) -> str:
+    return utc_timestamp(datetime.now(timezone.utc) - timedelta(days=days))
+
+
+class RetentionWorker:
+    """Background thread that archives expired rows every ``interval`` seconds.
+
+    Shards are archived one after another. A failed pass (a locked database,
+    a full disk) is logged and passed to ``on_error``, and the next pass
+    runs as usual.
+    """
+
+    def __init__(
+        self,
+        pools: Sequence[ConnectionPool],
+        archive_dir: Path,
+        *,
+        days: int,
+        interval: float = 3600,
+        batch_size: int = BATCH_SIZE,
+        on_batch: Callable[[], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> None:
+        self.pools = pools
+        self.archive_dir = archive_dir
+        self.days = days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="scan-retention", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:  # noqa: BLE001 - retried next interval
+                log.exception("retention pass failed")
+                if self.on_error is not None:
+                    self.on_error(exc)
+            self._stop.wait(self.interval)
+
+    def run_once(self) -> None:
+        cutoff = cutoff_for(self.days)
+        for pool in self.pools:
+            archive_expired(
+                pool,
+                self.archive_dir,
+                cutoff=cutoff,
+                batch_size=self.batch_size,
+                on_batch=self.on_batch,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Archive scan_runs rows older than a number of days."
+    )
+    parser.add_argument("db", type=Path, help="path to autoscan.db")
+    parser.add_argument("archive_dir", type=Path)
+    parser.add_argument("--days", type=int, required=True)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(args.db, size=1)
+    moved = archive_expired(
+        pool,
+        args.archive_dir,
+        cutoff=cutoff_for(args.days),
+        batch_size=args.batch_size,
+    )
+    pool.close()
+    print(f"archived {moved} rows into {args.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import re
+
+# Ranking looks at this many of the newest matches. FTS5's bm25() walks the
+# full doclist of every term to get its document frequency, which costs tens
+# of milliseconds for terms like "drift" that hit a third of a million-row
+# table; scoring a bounded window of recent matches keeps queries in the
+# low milliseconds.
+WINDOW = 500
+TARGET_WEIGHT = 4
+# Longest prefix with its own FTS index (see ``prefix`` below). Longer
+# prefixes are matched on their first PREFIX_MAX characters and narrowed in
+# Python, because an unindexed prefix merges the doclist of every term.
+PREFIX_MAX = 5
+# FTS5's default automerge level, restored after a bulk index.
+AUTOMERGE = 4
+
+_TOKEN = re.compile(r"\w+")
+
+
+def init_schema(conn) -> bool:
+    """Create the FTS index and its sync triggers; True if newly created."""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+        "AND name = 'scan_runs_fts'"
+    ).fetchone()
+    # External-content table: the index stores tokens only and reads
+    # target/summary back from scan_runs. Prefix indexes keep the
+    # hostname-fragment queries (``"host 01"*``) from scanning the term list.
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS scan_runs_fts USING fts5 (
+            target,
+            summary,
+            content = 'scan_runs',
+            content_rowid = 'id',
+            prefix = '2 3 4 5'
+        )
+        """
+    )
+    conn.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS scan_runs_fts_insert
+        AFTER INSERT ON scan_runs BEGIN
+            INSERT INTO scan_runs_fts (rowid, target, summary)
+            VALUES (new.id, new.target, new.summary);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scan_runs_fts_delete
+        AFTER DELETE ON scan_runs BEGIN
+            INSERT INTO scan_runs_fts (scan_runs_fts, rowid, target, summary)
+            VALUES ('delete', old.id, old.target, old.summary);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scan_runs_fts_update
+        AFTER UPDATE OF target, summary ON scan_runs BEGIN
+            INSERT INTO scan_runs_fts (scan_runs_fts, rowid, target, summary)
+            VALUES ('delete', old.id, old.target, old.summary);
+            INSERT INTO scan_runs_fts (rowid, target, summary)
+            VALUES (new.id, new.target, new.summary);
+        END;
+        """
+    )
+    return existed is None
+
+
+def index_after(conn, after_id: int) -> None:
+    """Index rows above ``after_id`` that were loaded without the trigger.
+
+    Segment merging is paused for the bulk insert; later writes resume it
+    incrementally, and query latency does not depend on it.
+    """
+    conn.execute(
+        "INSERT INTO scan_runs_fts (scan_runs_fts, rank) "
+        "VALUES ('automerge', 0)"
+    )
+    conn.execute(
+        "INSERT INTO scan_runs_fts (rowid, target, summary) "
+        "SELECT id, target, summary FROM scan_runs WHERE id > ?",
+        (after_id,),
+    )
+    conn.execute(
+        "INSERT INTO scan_runs_fts (scan_runs_fts, rank) "
+        f"VALUES ('automerge', {AUTOMERGE})"
+    )
+
+
+def rebuild(conn) -> None:
+    conn.execute(
+        "INSERT INTO scan_runs_fts (scan_runs_fts) VALUES ('rebuild')"
+    )
+    conn.commit()
+
+
+def parse_query(text: str) -> tuple[str, list[str]]:
+    """Turn free text into an FTS5 MATCH expression and its tokens.
+
+    Each whitespace-separated term becomes a phrase of its word tokens, so
+    ``web-01.prod`` matches the tokens web, 01, prod in sequence. The last
+    term is a prefix, so partially typed hostnames still match.
+    """
+    phrases = [
+        tokens
+        for tokens in (_TOKEN.findall(term.lower()) for term in text.split())
+        if tokens
+    ]
+    if not phrases:
+        raise ValueError("q must contain at least one word")
+    tokens = [token for phrase in phrases for token in phrase]
+    phrases[-1] = [*phrases[-1][:-1], tokens[-1][:PREFIX_MAX]]
+    expression = " ".join(f'"{" ".join(phrase)}"' for phrase in phrases)
+    return expression + " *", tokens
+
+
+def _score(row, tokens: list[str]) -> int:
+    """Weighted count of query-token hits; 0 if the full prefix is absent."""
+    prefix = tokens[-1]
+    score = 0
+    matched_prefix = False
+    for text, weight in ((row["target"], TARGET_WEIGHT), (row["summary"], 1)):
+        words = _TOKEN.findall(text.lower())
+        prefixed = sum(word.startswith(prefix) for word in words)
+        matched_prefix = matched_prefix or prefixed > 0
+        exact = sum(words.count(token) for token in tokens[:-1])
+        score += weight * (exact + prefixed)
+    return score if matched_prefix else 0
+
+
+def search(
+    conn, text: str, *, limit: int, offset: int = 0, window: int = WINDOW
+) -> list[dict]:
+    """Rank the newest ``window`` matches for ``text`` and return one page.
+
+    Rows with more query-term hits come first, target hits counting
+    TARGET_WEIGHT times a summary hit; ties go to the newer scan.
+    """
+    expression, tokens = parse_query(text)
+    rows = conn.execute(
+        """
+        SELECT s.id, s.target, s.automation_mode, s.status, s.summary,
+               s.created_at
+        FROM (
+            SELECT rowid FROM scan_runs_fts WHERE scan_runs_fts MATCH ?
+            ORDER BY rowid DESC LIMIT ?
+        ) AS hit
+        JOIN scan_runs AS s ON s.id = hit.rowid
+        """,
+        (expression, window),
+    ).fetchall()
+    scored = sorted(
+        (
+            item
+            for item in ((_score(row, tokens), row) for row in rows)
+            if item[0]
+        ),
+        key=lambda item: (-item[0], -item[1]["id"]),
+    )
+    return [
+        {**dict(row), "score": score}
+        for score, row in scored[offset : offset + limit]
+    ]
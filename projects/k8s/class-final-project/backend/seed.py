@@ -0,0 +1,228 @@
+"""Bulk-load synthetic scan_runs for capacity testing.
+
+Statuses, targets, modes and timestamps are drawn with NumPy a chunk at a
+time and written with executemany in a single transaction, so millions of
+rows load in seconds instead of going through insert_scan one by one.
+
+    python seed.py autoscan.db 10000000 --targets 5000 --days 90
+
+The database must already have its schema (start the backend once against
+it). Stats rollups and the search index are updated in the same transaction.
+Requires numpy (see requirements-dev.txt).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+import search
+import stats
+from db import ConnectionPool
+
+STATUSES = ("passed", "warning", "failed")
+# Same odds as simulate_scan in app.py.
+STATUS_WEIGHTS = (0.6, 0.3, 0.1)
+MODES = ("automated", "augmented", "manual")
+SUMMARIES = {
+    "passed": "{target} cleared {mode} checks.",
+    "warning": "{target} has drift indicators; schedule manual follow-up.",
+    "failed": "{target} triggered critical policy violations.",
+}
+CHUNK_SIZE = 200_000
+US_PER_DAY = 86_400 * 1_000_000
+
+
+def target_names(count: int) -> list[str]:
+    return [f"host-{index:04d}.cluster.local" for index in range(count)]
+
+
+def _bucket_counts(
+    dimension: str,
+    labels: np.ndarray,
+    bucket_idx: np.ndarray,
+    status_idx: np.ndarray,
+) -> dict[tuple[str, str, str], int]:
+    """Count rows per (bucket, status) with one bincount."""
+    counts = np.bincount(
+        bucket_idx * len(STATUSES) + status_idx,
+        minlength=len(labels) * len(STATUSES),
+    )
+    return {
+        (dimension, labels[bucket], STATUSES[status]): int(counts[slot])
+        for slot in np.flatnonzero(counts).tolist()
+        for bucket, status in [divmod(slot, len(STATUSES))]
+    }
+
+
+def generate_chunks(
+    rows: int,
+    *,
+    targets: list[str],
+    days: float,
+    end: np.datetime64,
+    seed: int,
+    chunk_size: int = CHUNK_SIZE,
+):
+    """Yield (scan_runs tuples, stats counts) pairs, oldest rows first.
+
+    Timestamps are spread evenly over the ``days`` before ``end`` with jitter
+    smaller than the spacing, so ids and created_at ascend together the way
+    they do for live inserts. The counts match what stats.record would
+    compute for the same rows.
+    """
+    rng = np.random.default_rng(seed)
+    target_values = np.array(targets, dtype=object)
+    mode_values = np.array(MODES, dtype=object)
+    status_values = np.array(STATUSES, dtype=object)
+    # One summary per (status, target, mode), looked up by flat index.
+    summaries = np.array(
+        [
+            SUMMARIES[status].format(target=target, mode=mode)
+            for status in STATUSES
+            for target in targets
+            for mode in MODES
+        ],
+        dtype=object,
+    )
+    span = int(days * US_PER_DAY)
+    start = end.astype("datetime64[us]").astype(np.int64) - span
+    step = max(span // max(rows, 1), 1)
+
+    for lo in range(0, rows, chunk_size):
+        hi = min(lo + chunk_size, rows)
+        count = hi - lo
+        status_idx = rng.choice(len(STATUSES), size=count, p=STATUS_WEIGHTS)
+        target_idx = rng.integers(0, len(targets), size=count)
+        mode_idx = rng.integers(0, len(MODES), size=count)
+        offsets = np.arange(lo, hi, dtype=np.int64) * step
+        moments = (start + offsets + rng.integers(0, step, size=count)).astype(
+            "datetime64[us]"
+        )
+        created = np.char.add(np.datetime_as_string(moments, unit="us"), "Z")
+        summary_idx = (status_idx * len(targets) + target_idx) * len(
+            MODES
+        ) + mode_idx
+
+        counts = {
+            **_bucket_counts("target", targets, target_idx, status_idx),
+            **_bucket_counts("mode", MODES, mode_idx, status_idx),
+        }
+        for dimension, unit in (("hour", "h"), ("day", "D")):
+            buckets = moments.astype(f"datetime64[{unit}]")
+            first = buckets[0]
+            labels = np.datetime_as_string(
+                np.arange(first, buckets[-1] + 1)
+            ).tolist()
+            counts.update(
+                _bucket_counts(
+                    dimension,
+                    labels,
+                    (buckets - first).astype(np.int64),
+                    status_idx,
+                )
+            )
+        rows_out = list(
+            zip(
+                target_values[target_idx].tolist(),
+                mode_values[mode_idx].tolist(),
+                status_values[status_idx].tolist(),
+                summaries[summary_idx].tolist(),
+                created.tolist(),
+            )
+        )
+        yield rows_out, counts
+
+
+def bulk_load(
+    pool: ConnectionPool,
+    rows: int,
+    *,
+    targets: list[str],
+    days: float = 30,
+    seed: int = 0,
+    end: np.datetime64 | None = None,
+) -> int:
+    """Append ``rows`` synthetic scans, their rollups and search entries.
+
+    Everything commits in one transaction. Per-row maintenance is skipped
+    while loading: the scan_runs indexes and FTS insert trigger are dropped
+    and recreated from their stored SQL, the new id range is indexed for
+    search in one statement, and rollups come pre-counted from NumPy.
+    Returns the number of rows written.
+    """
+    end = end if end is not None else np.datetime64("now", "us")
+    with pool.connection() as conn:
+        deferred = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL "
+            "AND ((type = 'index' AND tbl_name = 'scan_runs') "
+            "OR name = 'scan_runs_fts_insert')"
+        ).fetchall()
+        if not any(name == "scan_runs_fts_insert" for name, _ in deferred):
+            raise ValueError(
+                "scan_runs schema not found; start the backend once first"
+            )
+        conn.execute("PRAGMA synchronous = OFF")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            after_id = conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM scan_runs"
+            ).fetchone()[0]
+            for name, sql in deferred:
+                kind = (
+                    "TRIGGER" if sql.startswith("CREATE TRIGGER") else "INDEX"
+                )
+                conn.execute(f"DROP {kind} {name}")
+            for chunk, counts in generate_chunks(
+                rows, targets=targets, days=days, end=end, seed=seed
+            ):
+                conn.executemany(
+                    "INSERT INTO scan_runs "
+                    "(target, automation_mode, status, summary, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    chunk,
+                )
+                stats.record_counts(conn, counts)
+            search.index_after(conn, after_id)
+            for _, sql in deferred:
+                conn.execute(sql)
+            conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("PRAGMA synchronous = NORMAL")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Bulk-load synthetic scan runs for capacity testing."
+    )
+    parser.add_argument("db", type=Path, help="path to autoscan.db")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("--targets", type=int, default=500)
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(args.db, size=1)
+    started = time.perf_counter()
+    written = bulk_load(
+        pool,
+        args.rows,
+        targets=target_names(args.targets),
+        days=args.days,
+        seed=args.seed,
+    )
+    pool.close()
+    print(
+        f"loaded {written} rows into {args.db} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
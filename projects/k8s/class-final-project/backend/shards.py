@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from db import ConnectionPool
+
+# Region i allocates scan ids from i << ID_BITS upwards, so ids stay unique
+# across shards and the owning shard can be read back from any id.
+ID_BITS = 40
+
+T = TypeVar("T")
+
+
+def shard_path(path: Path, region: str) -> Path:
+    return path.with_name(f"{path.stem}-{region}{path.suffix}")
+
+
+class ShardSet:
+    """One SQLite database per region, each with its own write lock.
+
+    With no ``regions`` there is a single shard at ``path`` itself, named
+    after ``home``. Otherwise region ``r`` lives in ``<stem>-r<suffix>`` next
+    to ``path``. A region's position in ``regions`` fixes its id range, so
+    new regions must be appended, never inserted or reordered.
+    """
+
+    def __init__(
+        self, path: Path, regions: list[str], *, home: str, size: int = 8
+    ) -> None:
+        self.regions = list(regions) or [home]
+        if home not in self.regions:
+            raise ValueError(
+                f"home region {home!r} is not one of {', '.join(regions)}"
+            )
+        self.home = home
+        self.pools = {
+            region: ConnectionPool(
+                shard_path(path, region) if regions else path, size=size
+            )
+            for region in self.regions
+        }
+        self._executor = (
+            ThreadPoolExecutor(len(self.regions), thread_name_prefix="shard")
+            if len(self.regions) > 1
+            else None
+        )
+
+    def pool(self, region: str | None = None) -> ConnectionPool:
+        """The shard for ``region``; the home shard when it is None."""
+        try:
+            return self.pools[region or self.home]
+        except KeyError:
+            raise ValueError(
+                f"region must be one of {', '.join(self.regions)}"
+            ) from None
+
+    def id_base(self, region: str) -> int:
+        return self.regions.index(region) << ID_BITS
+
+    def region_of(self, scan_id: int) -> str | None:
+        index = scan_id >> ID_BITS
+        return self.regions[index] if index < len(self.regions) else None
+
+    def pool_for_id(self, scan_id: int) -> ConnectionPool | None:
+        region = self.region_of(scan_id)
+        return self.pools[region] if region is not None else None
+
+    def map(
+        self,
+        fn: Callable[[str, ConnectionPool], T],
+        regions: list[str] | None = None,
+    ) -> list[T]:
+        """Call ``fn(region, pool)`` on every shard concurrently.
+
+        Results come back in region order; SQLite releases the GIL while a
+        query runs, so per-shard reads overlap.
+        """
+        regions = regions or self.regions
+        if self._executor is None or len(regions) == 1:
+            return [fn(region, self.pools[region]) for region in regions]
+        return list(
+            self._executor.map(
+                lambda region: fn(region, self.pools[region]), regions
+            )
+        )
+
+    def close(self) -> None:
+        for pool in self.pools.values():
+            pool.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
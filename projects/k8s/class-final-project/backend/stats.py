@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable
+
+# dimension -> how a scan_runs row maps onto its bucket key. Time buckets are
+# prefixes of the stored ISO timestamp, so they sort chronologically as text.
+DIMENSIONS = {
+    "target": lambda row: row[0],
+    "mode": lambda row: row[1],
+    "hour": lambda row: row[3][:13],
+    "day": lambda row: row[3][:10],
+}
+TIME_DIMENSIONS = {"hour": 13, "day": 10}
+STATUSES = ("passed", "warning", "failed")
+
+_BUCKET_SQL = {
+    "target": "target",
+    "mode": "automation_mode",
+    "hour": "substr(created_at, 1, 13)",
+    "day": "substr(created_at, 1, 10)",
+}
+
+
+def init_schema(conn) -> bool:
+    """Create the rollup table; returns True when it did not exist yet."""
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scan_stats'"
+    ).fetchone()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scan_stats (
+            dimension TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (dimension, bucket, status)
+        ) WITHOUT ROWID
+        """
+    )
+    return existed is None
+
+
+def record(conn, rows: Iterable[tuple[str, str, str, str]]) -> None:
+    """Fold (target, automation_mode, status, created_at) rows into the rollups.
+
+    Runs on the caller's connection so the counters commit together with the
+    scan_runs rows they describe.
+    """
+    counts: Counter[tuple[str, str, str]] = Counter()
+    for row in rows:
+        for dimension, bucket_of in DIMENSIONS.items():
+            counts[(dimension, bucket_of(row), row[2])] += 1
+    record_counts(conn, counts)
+
+
+def record_counts(conn, counts: dict[tuple[str, str, str], int]) -> None:
+    """Add pre-aggregated (dimension, bucket, status) -> count to the rollups."""
+    conn.executemany(
+        """
+        INSERT INTO scan_stats (dimension, bucket, status, count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (dimension, bucket, status)
+        DO UPDATE SET count = count + excluded.count
+        """,
+        ((*key, count) for key, count in counts.items()),
+    )
+
+
+def fetch(
+    conn, dimension: str, *, since: str | None = None, until: str | None = None
+) -> list[dict]:
+    """Return per-bucket status counts for one dimension, ordered by bucket.
+
+    Like GET /api/scans, ``until`` is exclusive: the bucket starting at it
+    is left out. Bounds inside a bucket include that whole bucket, as the
+    rollups cannot be split.
+    """
+    clauses, params = ["dimension = ?"], [dimension]
+    if dimension in TIME_DIMENSIONS:
+        width = TIME_DIMENSIONS[dimension]
+        if since is not None:
+            clauses.append("bucket >= ?")
+            params.append(since[:width])
+        if until is not None:
+            # Past the prefix a bucket start is only zeros and separators.
+            on_boundary = not until[width:].strip("T:.0Z")
+            clauses.append("bucket < ?" if on_boundary else "bucket <= ?")
+            params.append(until[:width])
+
+    buckets: dict[str, dict] = {}
+    for row in conn.execute(
+        f"SELECT bucket, status, count FROM scan_stats WHERE {' AND '.join(clauses)} "
+        "ORDER BY bucket",
+        params,
+    ):
+        entry = buckets.setdefault(
+            row["bucket"],
+            {
+                "bucket": row["bucket"],
+                **dict.fromkeys(STATUSES, 0),
+                "total": 0,
+            },
+        )
+        entry[row["status"]] = row["count"]
+        entry["total"] += row["count"]
+    return list(buckets.values())
+
+
+def merge(results: Iterable[list[dict]]) -> list[dict]:
+    """Sum several fetch() results (one per shard) bucket by bucket."""
+    buckets: dict[str, dict] = {}
+    for result in results:
+        for entry in result:
+            total = buckets.setdefault(
+                entry["bucket"],
+                {
+                    "bucket": entry["bucket"],
+                    **dict.fromkeys(STATUSES, 0),
+                    "total": 0,
+                },
+            )
+            for key in (*STATUSES, "total"):
+                total[key] += entry[key]
+    return [buckets[bucket] for bucket in sorted(buckets)]
+
+
+def rebuild(conn, archived: Iterable[tuple[str, str, str, str]] = ()) -> int:
+    """Recompute every rollup from scan_runs plus any ``archived`` rows.
+
+    Returns the number of counters written.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("DELETE FROM scan_stats")
+    for dimension, bucket_sql in _BUCKET_SQL.items():
+        conn.execute(
+            f"""
+            INSERT INTO scan_stats (dimension, bucket, status, count)
+            SELECT ?, {bucket_sql}, status, COUNT(*)
+            FROM scan_runs GROUP BY {bucket_sql}, status
+            """,
+            (dimension,),
+        )
+    record(conn, archived)
+    total = conn.execute("SELECT COUNT(*) FROM scan_stats").fetchone()[0]
+    conn.commit()
+    return total
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The backend modules are flat files next to app.py, not a package.
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,175 @@
+"""NetworkEngine against asyncio stand-in servers on localhost."""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from engine import NetworkEngine
+
+
+class StandIns:
+    """HTTP stand-in servers sharing one event loop in a background thread.
+
+    Tracks how many connections are open at once across all of them.
+    """
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, daemon=True
+        )
+        self.thread.start()
+        self.servers: list[asyncio.AbstractServer] = []
+        self.open = 0
+        self.peak = 0
+
+    def http(self, status: int, delay: float = 0.0) -> int:
+        """Start a server answering ``status`` after ``delay``; its port."""
+
+        async def handle(reader, writer):
+            self.open += 1
+            self.peak = max(self.peak, self.open)
+            try:
+                while await reader.readline() not in (b"\r\n", b""):
+                    pass
+                await asyncio.sleep(delay)
+                writer.write(
+                    f"HTTP/1.1 {status} Stand-in\r\n"
+                    "Content-Length: 0\r\nConnection: close\r\n\r\n".encode()
+                )
+                await writer.drain()
+            finally:
+                self.open -= 1
+                writer.close()
+
+        server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(handle, "127.0.0.1", 0), self.loop
+        ).result()
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def _shutdown(self) -> None:
+        for server in self.servers:
+            server.close()
+        # Slow handlers may still be sleeping on a request nobody awaits.
+        handlers = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def stand_ins():
+    servers = StandIns()
+    yield servers
+    servers.close()
+
+
+@pytest.fixture
+def make_engine():
+    engines = []
+
+    def make(**options) -> NetworkEngine:
+        # Every stand-in is on 127.0.0.1, so the per-host limit would
+        # serialise them all.
+        engine = NetworkEngine(host_rate=0, **options)
+        engine.start()
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.stop()
+
+
+def test_summarizes_each_kind_of_target(stand_ins, make_engine):
+    ok = stand_ins.http(200)
+    broken = stand_ins.http(500)
+    missing = stand_ins.http(404)
+    closed = closed_port()
+    engine = make_engine(target_timeout=2)
+
+    results = engine.scan_many(
+        [
+            (f"http://127.0.0.1:{ok}/", "automated"),
+            (f"http://127.0.0.1:{broken}/", "automated"),
+            (f"http://127.0.0.1:{missing}/", "automated"),
+            (f"127.0.0.1:{closed}", "automated"),
+            ("ftp://127.0.0.1/", "automated"),
+        ]
+    )
+
+    assert [result["status"] for result in results] == [
+        "passed",
+        "failed",
+        "warning",
+        "failed",
+        "failed",
+    ]
+    assert "HTTP 200" in results[0]["summary"]
+    assert "HTTP 500" in results[1]["summary"]
+    assert "unreachable" in results[3]["summary"]
+    assert "not a scannable target" in results[4]["summary"]
+
+
+def test_slow_target_times_out(stand_ins, make_engine):
+    slow = stand_ins.http(200, delay=2)
+    engine = make_engine(target_timeout=0.3)
+
+    started = time.monotonic()
+    result = engine.scan(f"http://127.0.0.1:{slow}/", "automated")
+
+    assert result["status"] == "failed"
+    assert "did not finish checks within 0.3s" in result["summary"]
+    assert time.monotonic() - started < 1.5
+
+
+def test_queued_targets_do_not_time_out(stand_ins, make_engine):
+    # 24 targets through 4 slots at 0.25s each take ~1.5s, longer than the
+    # timeout; waiting for a slot must not count against a target.
+    port = stand_ins.http(200, delay=0.25)
+    engine = make_engine(concurrency=4, target_timeout=1)
+
+    started = time.monotonic()
+    results = engine.scan_many(
+        [(f"http://127.0.0.1:{port}/", "automated")] * 24
+    )
+
+    assert [result["status"] for result in results] == ["passed"] * 24
+    assert stand_ins.peak <= 4
+    assert time.monotonic() - started >= 1.5
+
+
+def test_fingerprint_is_stable_and_none_on_timeout(stand_ins, make_engine):
+    ok = stand_ins.http(200)
+    slow = stand_ins.http(200, delay=2)
+    engine = make_engine(target_timeout=0.3)
+
+    first, again, timed_out = engine.fingerprint_many(
+        [
+            (f"http://127.0.0.1:{ok}/", "automated"),
+            (f"http://127.0.0.1:{ok}/", "automated"),
+            (f"http://127.0.0.1:{slow}/", "automated"),
+        ]
+    )
+
+    assert first is not None
+    assert first == again
+    assert timed_out is None
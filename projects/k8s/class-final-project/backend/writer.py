@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, TypeVar
+
+from db import ConnectionPool
+
+T = TypeVar("T")
+
+# Writes a group of rows on an open transaction and returns their ids in order.
+Write = Callable[[object, list[T]], list[int]]
+
+
+class GroupCommitWriter(Generic[T]):
+    """Single writer thread that commits concurrent inserts together.
+
+    Callers hand rows to submit() and wait on the returned future. The
+    thread takes the first waiting row, keeps collecting for ``interval``
+    seconds or until ``max_rows``, writes the group in one transaction and
+    resolves every future with its row id once the commit returns. If the
+    transaction fails, every caller in the group gets the exception.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        write: Write[T],
+        *,
+        interval: float = 0.002,
+        max_rows: int = 256,
+        on_commit: Callable[[list[T], list[int]], None] | None = None,
+        name: str = "group-commit",
+    ) -> None:
+        self.pool = pool
+        self.write = write
+        self.interval = interval
+        self.max_rows = max_rows
+        self.on_commit = on_commit
+        self.name = name
+        self._queue: queue.Queue[tuple[T, Future[int]] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=self.name, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Commit what is already queued, then end the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, row: T) -> Future[int]:
+        if self._thread is None:
+            raise RuntimeError(f"{self.name} writer is not running")
+        future: Future[int] = Future()
+        self._queue.put((row, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            group = [item]
+            stopping = False
+            deadline = time.monotonic() + self.interval
+            while len(group) < self.max_rows:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+            self._commit(group)
+            if stopping:
+                return
+
+    def _commit(self, group: list[tuple[T, Future[int]]]) -> None:
+        rows = [row for row, _ in group]
+        try:
+            with self.pool.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row_ids = self.write(conn, rows)
+                conn.commit()
+        except Exception as exc:  # noqa: BLE001 - handed to every caller
+            for _, future in group:
+                future.set_exception(exc)
+            return
+
+        try:
+            if self.on_commit is not None:
+                self.on_commit(rows, row_ids)
+        finally:
+            for (_, future), row_id in zip(group, row_ids):
+                future.set_result(row_id)
@@ -1,5 +1,7 @@
 import { useEffect, useState } from 'react'
-import { getScans, runScan } from '../services/api.js'
+import { getScans, runScan, subscribeScans } from '../services/api.js'
+
+const MAX_ROWS = 20
 
 const defaultForm = {
   target: 'https://internal.cluster',
@@ -24,6 +26,14 @@ function Dashboard() {
 
   useEffect(() => {
     loadScans()
+    // New scans arrive over the stream instead of re-fetching the list.
+    return subscribeScans((scan) => {
+      setScans((current) =>
+        current.some((item) => item.id === scan.id)
+          ? current
+          : [scan, ...current].slice(0, MAX_ROWS),
+      )
+    })
   }, [])
 
   const onSubmit = async (evt) => {
@@ -32,7 +42,6 @@ function Dashboard() {
     try {
       await runScan(form)
       setForm((current) => ({ ...current, target: '' }))
-      await loadScans()
     } catch (err) {
       setError(err.message)
     } finally {
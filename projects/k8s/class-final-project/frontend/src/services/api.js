@@ -2,13 +2,17 @@ const API_BASE_URL = import.meta.env.VITE_API_URL ?? 'http://127.0.0.1:5000'
 
 async function request(endpoint, options = {}) {
   const response = await fetch(`${API_BASE_URL}${endpoint}`, {
-    headers: { 'Content-Type': 'application/json', ...(options.headers || {}) },
     ...options,
+    headers: { 'Content-Type': 'application/json', ...(options.headers || {}) },
   })
 
   if (!response.ok) {
     const message = await response.text()
-    throw new Error(message || `Request failed with ${response.status}`)
+    const error = new Error(message || `Request failed with ${response.status}`)
+    error.status = response.status
+    // Seconds the backend asked us to wait when it sheds load (429/503).
+    error.retryAfter = Number(response.headers.get('Retry-After')) || 0
+    throw error
   }
 
   return response.json()
@@ -19,11 +23,60 @@ export async function getScans() {
   return payload.items ?? []
 }
 
+// Calls onScan for every scan recorded after subscribing. EventSource
+// reconnects on its own and resumes from the last event it received.
+export function subscribeScans(onScan) {
+  const source = new EventSource(`${API_BASE_URL}/api/scans/stream`)
+  source.addEventListener('scan', (event) => onScan(JSON.parse(event.data)))
+  return () => source.close()
+}
+
+const JOB_POLL_INTERVAL_MS = 500
+const JOB_POLL_ATTEMPTS = 120
+const SUBMIT_ATTEMPTS = 3
+// Load shedding is worth waiting out; any other answer will not change.
+const RETRY_STATUSES = new Set([429, 503])
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms))
+
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost), and
+// the cluster serves this page over plain HTTP; getRandomValues works in both.
+function newIdempotencyKey() {
+  const bytes = crypto.getRandomValues(new Uint8Array(16))
+  return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('')
+}
+
+async function submitScan(data) {
+  // One key for every attempt, so a retry after a lost response returns the
+  // job the first attempt created instead of queueing another scan.
+  const idempotencyKey = newIdempotencyKey()
+  for (let attempt = 1; ; attempt += 1) {
+    try {
+      return await request('/api/scans', {
+        method: 'POST',
+        headers: { 'Idempotency-Key': idempotencyKey },
+        body: JSON.stringify(data),
+      })
+    } catch (error) {
+      // No status means the request never got an answer (network error).
+      const retryable = error.status === undefined || RETRY_STATUSES.has(error.status)
+      if (!retryable || attempt >= SUBMIT_ATTEMPTS) throw error
+      await sleep(error.retryAfter * 1000 || JOB_POLL_INTERVAL_MS * attempt)
+    }
+  }
+}
+
 export async function runScan(data) {
-  return request('/api/scans', {
-    method: 'POST',
-    body: JSON.stringify(data),
-  })
+  const job = await submitScan(data)
+
+  // Scans run on the backend job queue; poll until the job settles.
+  for (let attempt = 0; attempt < JOB_POLL_ATTEMPTS; attempt += 1) {
+    const current = await request(`/api/scans/${job.id}`)
+    if (current.state === 'done') return current
+    if (current.state === 'failed') throw new Error(current.error || 'Scan failed')
+    await sleep(JOB_POLL_INTERVAL_MS)
+  }
+  throw new Error(`Scan ${job.id} is still running; check back shortly.`)
 }
 
 export async function getEnvironmentSnapshot() {